@@ -3,8 +3,38 @@ from dash import Dash, html, dcc, callback, Output, Input
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
+import os
+import sys
+from riskscape_data import datasets
+from riskscape_tiles import tiles
 
-app = Dash(__name__, use_pages=True, external_stylesheets = [dbc.themes.BOOTSTRAP])
+# page layouts are functions that load their data on first visit, so Dash must
+# not call every one of them up front to validate callbacks
+app = Dash(__name__, use_pages=True, external_stylesheets = [dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+# vector tiles of the building and road impact outputs, under /tiles/
+app.server.register_blueprint(tiles)
+# the WSGI application production servers run, eg: gunicorn -c gunicorn.conf.py app:server
+server = app.server
+
+
+def preload():
+    """Load the data of every page that defines a preload() function.
+
+    Run by gunicorn.conf.py in the server process before it forks its
+    workers, so they share one copy of the loaded datasets.
+    """
+    for page in dash.page_registry.values():
+        module = sys.modules.get(page["module"])
+        if hasattr(module, "preload"):
+            module.preload()
+
+
+def watch():
+    """Swap in outputs replaced while the app runs, preloading the pages' data from them first.
+
+    Run in each process serving requests, as its own background thread.
+    """
+    datasets.watch(prepare=preload)
 
 app.layout = html.Div([
     html.H2(children='Pacific Risk Tool for Resilience, Phase 2 (PARTneR-2)', style={'textAlign':'center'}),
@@ -35,5 +65,8 @@ app.layout = html.Div([
 
 
 if __name__ == '__main__':
+    # the debug reloader's parent process only restarts the one serving
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        watch()
     app.run(debug=True)
 
@@ -0,0 +1,55 @@
+// Client-side callbacks shared by the dashboard pages.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    riskscape: {
+        // Info box of the map feature under the pointer, built from the lookup
+        // riskscape_data.hover_info() ships with the page, so hovering needs no
+        // server round trip.
+        info_box: function(feature, info) {
+            const component = (type, children, props) => ({
+                type: type,
+                namespace: "dash_html_components",
+                props: Object.assign({children: children}, props),
+            });
+            if (!info) {
+                return window.dash_clientside.no_update;
+            }
+            const header = component("B", info.title);
+            const values = feature && info.features[feature.id];
+            if (!values) {
+                return [header, component("P", "N/A")];
+            }
+            const rows = info.labels.map((label, i) => component("Tr", [
+                component("Td", label),
+                component("Td", values[i + 1]),
+            ]));
+            return [
+                header,
+                component("P", values[0]),
+                component(
+                    "Div",
+                    component("Table", rows, {style: {border: "1px solid black"}}),
+                    {style: {textAlign: "left"}}
+                ),
+            ];
+        },
+
+        // The map's view once it is zoomed in to min_zoom, or null further out,
+        // so panning and zooming out there makes no requests once a layer drawn
+        // from the view has been cleared.
+        map_view: function(bounds, zoom, min_zoom, view) {
+            if (!bounds || zoom === undefined || zoom === null || zoom < min_zoom) {
+                return view == null ? window.dash_clientside.no_update : null;
+            }
+            return {bounds: bounds, zoom: zoom};
+        },
+
+        // Pass an interval's ticks on only while the page is visible, so
+        // callbacks polling for new data make no requests from hidden tabs.
+        visible_tick: function(n_intervals) {
+            if (document.visibilityState !== "visible") {
+                return window.dash_clientside.no_update;
+            }
+            return n_intervals;
+        },
+    },
+});
@@ -0,0 +1,39 @@
+import gc
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Production serving of the dashboards, eg: gunicorn -c gunicorn.conf.py app:server
+#
+# The app and the data of every page are loaded once in the server process,
+# which then forks the workers. Until a worker replaces a dataset because its
+# output changed, every worker reads the same physical copy of it.
+
+load_dotenv()
+
+bind = os.getenv("RISKSCAPE_BIND", "0.0.0.0:8050")
+# processes serving requests, each with its own interpreter and figure cache
+workers = int(os.getenv("RISKSCAPE_WORKERS", str(multiprocessing.cpu_count())))
+# threads per worker, which overlap tile requests and callbacks waiting on files
+worker_class = "gthread"
+threads = int(os.getenv("RISKSCAPE_THREADS", "4"))
+# seconds a request may take, enough for the first load of an output replaced under a running server
+timeout = int(os.getenv("RISKSCAPE_TIMEOUT", "120"))
+preload_app = True
+
+
+def on_starting(server):
+    import app
+
+    server.log.info("Preloading dashboard data")
+    app.preload()
+    # keep the collector from writing to the preloaded objects in each worker,
+    # which would copy the memory pages holding them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+
+    # threads do not survive the fork, so each worker watches for new outputs itself
+    app.watch()
@@ -1,5 +1,6 @@
 import dash
-from dash import Dash, html, dcc, callback, Output, Input, State
+from dash import Dash, html, dcc, callback, clientside_callback, ClientsideFunction, Output, Input, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import geopandas as gpd
@@ -10,11 +11,14 @@ import json
 from collections import OrderedDict
 import plotly.graph_objects as go
 import io
+import os
 # import rasterio
 # from rasterio.plot import show
 # from rasterio import features
 from shapely.geometry import shape
 import matplotlib as plt
+from riskscape_data import datasets, map_layer_zoom
+from riskscape_figures import cached_figure
 
 
 
@@ -24,38 +28,9 @@ project_name = "cooks_pdia"
 
 ############################### LOAD DATA AND PREPARE RISKSCAPE DATA ###############################
 
-#  datasets  #
-#load damaged buildings
-gdf_damaged_buildings = gpd.read_file("data/" + project_name + "/" + "damaged-buildings.gpkg")
-
-#load damaged roads
-gdf_damaged_roads = gpd.read_file("data/" + project_name + "/" + "damaged-roads.gpkg")
-
-#load exposure by cluster
-gdf_exposure_by_cluster = gpd.read_file( "data/" + project_name + "/" + "exposure-by-cluster.geojson")
-
-#load regional impacts by sector
-gdf_regional_impacts_by_sector = gpd.read_file("data/" + project_name + "/" + "regional-impacts-by-sector.geojson")
-
-#load regional impacts
-gdf_regional_impacts = gpd.read_file("data/" + project_name + "/" + "regional-impacts.geojson")
-
-
-#  CSV's  #
-#load impact by asset type
-df_impact_by_asset_type = pd.read_csv("data/" + project_name + "/" + "impact-by-asset-type.csv")
-
-#load national impacts by sector
-df_national_impact_by_sector = gpd.read_file("data/" + project_name + "/" + "national-impact-by-sector-SK.csv")
-
-#load national summary
-df_national_summary = pd.read_csv("data/" + project_name + "/" + "national-summary.csv")
-
-#load regional summary
-df_regional_summary = pd.read_csv("data/" + project_name + "/" + "regional-summary.csv")
-
-#load regional summary by sector
-df_regional_summary_by_sector = gpd.read_file("data/" + project_name + "/" + "regional-summary-by-sector.csv")
+# damaged buildings and roads, exposure by cluster, regional and national impacts
+# and summaries are loaded through the shared registry the first time a callback
+# needs them, eg: datasets.get(project_name, "pdna-regional-impacts")
 
 
 ############################### DASH CALLBACK FOR MAP EXTENT ###############################
@@ -92,81 +67,80 @@ def update_map_extent(selected_country):
 # Base URL for the GeoServer WMS
 GEOSERVER_URL = "https://nexus.pacificdata.org/geoserver/geonode/wms"
 
+# zoom the map opens at, which decides how simplified the regions first sent are
+MAP_ZOOM = 5
+
+# WMS layer drawn over the regions for each hazard, and its component id
+HAZARD_LAYERS = {
+    "All hazards": ("geonode:ref_tc_meena_cook_islands_cyclone_track", "cyclone-track-layer"),
+    "Coastal Inundation": ("geonode:tc_lola_coastalinundation", "inundation-layer"),
+    "Wind": ("geonode:ref_tc_meena_cook_islands_wind_swaths", "wind-swath-layer"),
+    "Wave Height": ("	geonode:tc_lola_hs_max", "wave_height-layer"),
+}
+
+
+# the overlays are a layer group of their own, so choosing hazards sends only
+# their few WMS layers and leaves the regions already on the map alone
 @callback(
-    Output("pdna-map", "children"),
-    Input("hazard-select", "value")
+    Output("pdna-hazard-layers", "children"),
+    Input("hazard-select", "value"),
 )
-def update_map_layer(selected_hazards):
-    layers = [
-        dl.TileLayer(),
-        dl.GeoJSON(
-            data=json.loads(
-                gdf_regional_impacts["geometry"].to_json()
-            ),
-            id="map-region-impact",
-            # zoomToBounds=True,
-            zoomToBoundsOnClick=True,
-            style=dict(
-                weight=2,
-                opacity=1,
-                color="red",
-                fillOpacity=0.5,
-                # colorscale=colorscale,
-            ),
-        )        
-    ]  # Base map layer
-
+def update_hazard_layers(selected_hazards):
+    layers = []
     for hazard in selected_hazards:
-        if hazard == "All hazards":
+        if hazard in HAZARD_LAYERS:
+            wms_layers, layer_id = HAZARD_LAYERS[hazard]
             layers.append(
                 dl.WMSTileLayer(
                     url=GEOSERVER_URL,
-                    layers="geonode:ref_tc_meena_cook_islands_cyclone_track", 	
+                    layers=wms_layers,
                     format="image/png",
                     transparent=True,
-                    id="cyclone-track-layer"
+                    id=layer_id
                 )
             )
+    return layers
 
-        elif hazard == "Coastal Inundation":
-            layers.append(
-                dl.WMSTileLayer(
-                    url=GEOSERVER_URL,
-                    layers="geonode:tc_lola_coastalinundation",
-                    format="image/png",
-                    transparent=True,
-                    id="inundation-layer"
-                )
-            )
 
-        elif hazard == "Wind":
-            layers.append(
-                dl.WMSTileLayer(
-                    url=GEOSERVER_URL,
-                    layers="geonode:ref_tc_meena_cook_islands_wind_swaths",
-                    format="image/png",
-                    transparent=True,
-                    id="wind-swath-layer"
-                )
-            )
-
-        elif hazard == "Wave Height":
-            layers.append(
-                dl.WMSTileLayer(
-                    url=GEOSERVER_URL,
-                    layers="	geonode:tc_lola_hs_max",
-                    format="image/png",
-                    transparent=True,
-                    id="wave_height-layer"
-                )
-            )
-    
-    return layers  # Always return the base map layer + any additional layers
+@callback(
+    Output("pdna-regions", "data"),
+    Output("pdna-map-level", "data"),
+    Input("pdna-map", "zoom"),
+    State("pdna-map-level", "data"),
+    prevent_initial_call=True,
+)
+def update_map_layer(zoom, served_level):
+    # regions are sent simplified to suit the map's zoom, and only resent when that changes
+    level = map_layer_zoom(zoom)
+    if level == served_level:
+        raise PreventUpdate
+    return datasets.map_layers(project_name, "pdna-regional-impacts")[level], level
 
 
 
 ############################### DASH CALLBACK FOR GRAPHS ###############################
 
+# the graphs are drawn from these and cached until they change
+SECTOR_DATASETS = ("pdna-national-impact-by-sector", "pdna-regional-summary-by-sector")
+# values of the regional summary the graphs stack by sector for each region
+SECTOR_CUBE_COLUMNS = ("Total_Exposed_Value", "Total_Loss", "Total_Wind_Loss", "Total_Fluvial_Loss", "Total_Coastal_Loss")
+
+
+def sector_cube():
+    """Return the region by sector totals of each of SECTOR_CUBE_COLUMNS in the regional summary.
+
+    Computed once per version of the output, and only read by the callbacks.
+    """
+    def load():
+        df = datasets.get(project_name, "pdna-regional-summary-by-sector")
+        columns = [column for column in SECTOR_CUBE_COLUMNS if column in df.columns]
+        grouped_df = df.groupby(["Region", "Sector"])[columns].sum().unstack().fillna(0)
+        cube = {column: grouped_df[column] for column in columns}
+        return cube, int(grouped_df.memory_usage(deep=True).sum())
+    kind = "pdna-regional-summary-by-sector"
+    return datasets.cached((project_name, kind, "sector_cube"), datasets.version(project_name, kind), load)
+
+
 # Update graphs based on selected cluster and aggregation level
 # Cluster x National 
 # Cluster x Regional
@@ -177,7 +151,9 @@ def update_map_layer(selected_hazards):
     Output("exposure", "figure"),
     Input("aggregation-select", "value")
 )
+@cached_figure(lambda *selections: datasets.version(project_name, *SECTOR_DATASETS))
 def update_exposure_graph(selected_aggregation):
+    df_national_impact_by_sector = datasets.get(project_name, "pdna-national-impact-by-sector")
 
     # Check if both selections are made
     if not selected_aggregation:
@@ -199,7 +175,7 @@ def update_exposure_graph(selected_aggregation):
     
     # Handle National Aggregation
     if selected_aggregation.lower() == "national":
-        df = df_national_impact_by_sector.copy()
+        df = df_national_impact_by_sector
         
         # Create Bar Chart
         fig = go.Figure(
@@ -228,7 +204,6 @@ def update_exposure_graph(selected_aggregation):
     elif selected_aggregation.lower() == "regional":
         # if clickData is not None:            
         #     print(json.dumps(clickData))
-        df = df_regional_summary_by_sector.copy()
 
         
         # grouped_df = df.groupby(['Region', 'Sector'])['Total_Exposed_Value'].sum().unstack().fillna(0)
@@ -258,8 +233,8 @@ def update_exposure_graph(selected_aggregation):
         # return fig
 
         
-        # Group by Region and Sector, then sum Total_Exposed_Value
-        grouped_df = df.groupby(['Region', 'Sector'])['Total_Exposed_Value'].sum().unstack().fillna(0)
+        # Total_Exposed_Value summed by Region and Sector
+        grouped_df = sector_cube()['Total_Exposed_Value']
         
         # Create a trace for each sector
         traces = []
@@ -324,7 +299,11 @@ def update_exposure_graph(selected_aggregation):
      Input("aggregation-select", "value")
     ]
 )
+@cached_figure(lambda *selections: datasets.version(project_name, *SECTOR_DATASETS))
 def update_damage_summary_graph(selected_hazards, selected_aggregation):
+    df_national_impact_by_sector = datasets.get(project_name, "pdna-national-impact-by-sector")
+    cube = sector_cube()
+
     # Validate that exactly one hazard is selected
     if len(selected_hazards) != 1:
         return go.Figure(
@@ -401,10 +380,9 @@ def update_damage_summary_graph(selected_hazards, selected_aggregation):
     # Handle Regional Aggregation
     elif selected_aggregation.lower() == "regional":
         # Check if the row title is present in the index
-        if col_title in df_regional_summary_by_sector.columns:
-            df = df_regional_summary_by_sector.copy()
-        # Group by Region and Sector, then sum Total_Exposed_Value
-            grouped_df = df.groupby(['Region', 'Sector'])[col_title].sum().unstack().fillna(0)
+        if col_title in cube:
+            # col_title summed by Region and Sector
+            grouped_df = cube[col_title]
         
             # Create a trace for each sector
             traces = []
@@ -449,12 +427,26 @@ def update_damage_summary_graph(selected_hazards, selected_aggregation):
 
 # Non-interactive National Level Summary Boxes
 
+# the summaries are drawn from these, sent with the page and resent only when they change
+SUMMARY_DATASETS = ("pdna-national-summary", "pdna-impact-by-asset-type")
+# seconds between checks for a new run's summaries while the page is visible, 0 to not check
+SUMMARY_REFRESH_SECONDS = int(os.getenv("RISKSCAPE_SUMMARY_REFRESH_SECONDS", "3600"))
+
+
+def summary_version():
+    # as text, the nanosecond version is too large for a JavaScript number
+    return f"{datasets.version(project_name, *SUMMARY_DATASETS):x}"
+
+
 # Exposure Summary Box
-@callback(
-    Output("national-summary-text", "children"),
-    Input("interval-component", "n_intervals")  # Trigger callback on every interval tick
-)
-def update_national_summary(n_intervals):
+def national_summary():
+    def load():
+        return national_summary_text(datasets.get(project_name, "pdna-national-summary")), 1000
+    kind = "pdna-national-summary"
+    return datasets.cached((project_name, kind, "summary_text"), datasets.version(project_name, kind), load)
+
+
+def national_summary_text(df_national_summary):
     # Titles to look for
     titles = [
         "Buildings_Exposed_To_Any_Hazard", 
@@ -478,11 +470,14 @@ def update_national_summary(n_intervals):
 
 
 # Damage Summary Box
-@callback(
-    Output("damage-summary-text", "children"),
-    Input("interval-component", "n_intervals")  # Use the interval to trigger the update
-)
-def update_loss_damage_summary(n_intervals):
+def loss_damage_summary():
+    def load():
+        return loss_damage_summary_text(datasets.get(project_name, "pdna-impact-by-asset-type")), 1000
+    kind = "pdna-impact-by-asset-type"
+    return datasets.cached((project_name, kind, "summary_text"), datasets.version(project_name, kind), load)
+
+
+def loss_damage_summary_text(df_impact_by_asset_type):
     # Start from the second row (index 1)
     titles = df_impact_by_asset_type.iloc[1:, 0].tolist()  # First column contains the titles
     values = df_impact_by_asset_type.iloc[1:, 1].tolist()  # Second column contains the values
@@ -494,187 +489,221 @@ def update_loss_damage_summary(n_intervals):
     return html.Pre(f"{summary_text}", style={"font-family": "Times New Roman", "font-size": "14px"})
 
 
+# the interval only ticks the store while the page is visible, so hidden tabs
+# make no requests, and the summaries are resent only once a new run has landed
+clientside_callback(
+    ClientsideFunction(namespace="riskscape", function_name="visible_tick"),
+    Output("pdna-refresh-tick", "data"),
+    Input("pdna-refresh", "n_intervals"),
+    prevent_initial_call=True,
+)
+
+
+@callback(
+    Output("national-summary-text", "children"),
+    Output("damage-summary-text", "children"),
+    Output("pdna-summary-version", "data"),
+    Input("pdna-refresh-tick", "data"),
+    State("pdna-summary-version", "data"),
+    prevent_initial_call=True,
+)
+def refresh_summaries(tick, served_version):
+    version = summary_version()
+    if version == served_version:
+        raise PreventUpdate
+    return national_summary(), loss_damage_summary(), version
+
+
+def preload():
+    """Load what the page shows, eg before the workers of a production server are forked."""
+    if not datasets.exists(project_name, "pdna-regional-impacts"):
+        return
+    datasets.map_layers(project_name, "pdna-regional-impacts")
+    for kind in SECTOR_DATASETS + SUMMARY_DATASETS:
+        datasets.get(project_name, kind)
+    sector_cube()
+    national_summary()
+    loss_damage_summary()
+
+
 ############################### DASHBOARD LAYOUT ###############################
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(
-                html.H3("Post Disaster Impact Estimate (PDIE)", style={"textAlign": "center", "color": "black"})
-            ),
-            style={"backgroundColor": "#eaeded", "padding": "10px"}  # background for the header row
-        ),
-        dbc.Row(
-            [
-                # Column for Dropdowns
+def layout(**kwargs):
+    return html.Div(
+        [
+            dbc.Row(
                 dbc.Col(
-                    [
-                        html.Div(
-                            [
-                                html.P("Please select a country for analysis:", style={"color": "black"}),
-                                html.Label("Country:", style={"color": "black"}),
-                                dcc.Dropdown(
-                                    options=[
-                                        {"label": "Tonga", "value": "Tonga"},
-                                        {"label": "Samoa", "value": "Samoa"},
-                                        {"label": "Cook Islands", "value": "Cook Islands"},
-                                        {"label": "Vanuatu", "value": "Vanuatu"},
-                                    ],
-                                    value="",
-                                    id="country-select",
-                                    style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
-                                ),
-                            ],
-                            style={"marginBottom": "10px"}
-                        ),
-                        html.Div(
-                            [
-                                html.P("Please select the aggregation level you would the anaylsis performed at:", style={"color": "black"}),
-                                html.Label("Aggregation:", style={"color": "black"}),
-                                dcc.Dropdown(
-                                    options=[
-                                        {"label": "National", "value": "National"},
-                                        {"label": "Regional", "value": "Regional"}
-                                    ],
-                                    value="",
-                                    id="aggregation-select",
-                                    style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
-                                ),
-                            ]
-                        ),
-                        html.Div(
-                            [
-                                html.P("Please select the hazard you want visualized on the map:", style={"color": "black"}),
-                                html.Label("Hazard:", style={"color": "black"}),
-                                dcc.Dropdown(
-                                    options=[
-                                        {"label": "Wave Height", "value": "Wave Height"},
-                                        {"label": "Coastal Inundation", "value": "Coastal Inundation"},
-                                        {"label": "All hazards", "value": "All hazards"},
-                                        {"label": "Wind", "value": "Wind"},
-                                    ],
-                                    value="", # No default seclection
-                                    id="hazard-select",
-                                    multi=True, # Enable multiple selections
-                                    style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
-                                ),
-                            ],
-                            style={"marginBottom": "10px"}
-                        ),
-                        # html.Div(
-                        #     [
-                        #         html.P("Please select the cross sectoral cluster you want to analyse:", style={"color": "black"}),
-                        #         html.Label("Cluster:", style={"color": "black"}),
-                        #         dcc.Dropdown(
-                        #             options=[
-                        #                 {"label": "Residential", "value": "Residential"},
-                        #                 {"label": "Productive", "value": "Productive"},
-                        #                 {"label": "Infrastructure", "value": "Infrastructure"},
-                        #                 {"label": "Education", "value": "Education"},
-                        #                 {"label": "Public", "value": "Public"},
-                        #                 {"label": "Others", "value": "Others"},
-                        #                 {"label": "Unknown", "value": "Unknown"},
-                        #             ],
-                        #             value="",
-                        #             id="cluster-select",
-                        #             style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
-                        #         ),
-                        #     ],
-                        #     style={"marginBottom": "10px"}
-                        # ),
-                    ],
-                    width=2,  # Width for dropdowns column
-                    style={"paddingRight": "10px"}  # Add some spacing on the right side
+                    html.H3("Post Disaster Impact Estimate (PDIE)", style={"textAlign": "center", "color": "black"})
                 ),
-                # Column for Map, Graphs, and Text Boxes
-                dbc.Col(
-                    [
-                        dbc.Row(
-                            [
-                                dbc.Col(
-                                    dl.Map(
+                style={"backgroundColor": "#eaeded", "padding": "10px"}  # background for the header row
+            ),
+            dbc.Row(
+                [
+                    # Column for Dropdowns
+                    dbc.Col(
+                        [
+                            html.Div(
+                                [
+                                    html.P("Please select a country for analysis:", style={"color": "black"}),
+                                    html.Label("Country:", style={"color": "black"}),
+                                    dcc.Dropdown(
+                                        options=[
+                                            {"label": "Tonga", "value": "Tonga"},
+                                            {"label": "Samoa", "value": "Samoa"},
+                                            {"label": "Cook Islands", "value": "Cook Islands"},
+                                            {"label": "Vanuatu", "value": "Vanuatu"},
+                                        ],
+                                        value="",
+                                        id="country-select",
+                                        style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
+                                    ),
+                                ],
+                                style={"marginBottom": "10px"}
+                            ),
+                            html.Div(
+                                [
+                                    html.P("Please select the aggregation level you would the anaylsis performed at:", style={"color": "black"}),
+                                    html.Label("Aggregation:", style={"color": "black"}),
+                                    dcc.Dropdown(
+                                        options=[
+                                            {"label": "National", "value": "National"},
+                                            {"label": "Regional", "value": "Regional"}
+                                        ],
+                                        value="",
+                                        id="aggregation-select",
+                                        style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
+                                    ),
+                                ]
+                            ),
+                            html.Div(
+                                [
+                                    html.P("Please select the hazard you want visualized on the map:", style={"color": "black"}),
+                                    html.Label("Hazard:", style={"color": "black"}),
+                                    dcc.Dropdown(
+                                        options=[
+                                            {"label": "Wave Height", "value": "Wave Height"},
+                                            {"label": "Coastal Inundation", "value": "Coastal Inundation"},
+                                            {"label": "All hazards", "value": "All hazards"},
+                                            {"label": "Wind", "value": "Wind"},
+                                        ],
+                                        value="", # No default seclection
+                                        id="hazard-select",
+                                        multi=True, # Enable multiple selections
+                                        style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
+                                    ),
+                                ],
+                                style={"marginBottom": "10px"}
+                            ),
+                            # html.Div(
+                            #     [
+                            #         html.P("Please select the cross sectoral cluster you want to analyse:", style={"color": "black"}),
+                            #         html.Label("Cluster:", style={"color": "black"}),
+                            #         dcc.Dropdown(
+                            #             options=[
+                            #                 {"label": "Residential", "value": "Residential"},
+                            #                 {"label": "Productive", "value": "Productive"},
+                            #                 {"label": "Infrastructure", "value": "Infrastructure"},
+                            #                 {"label": "Education", "value": "Education"},
+                            #                 {"label": "Public", "value": "Public"},
+                            #                 {"label": "Others", "value": "Others"},
+                            #                 {"label": "Unknown", "value": "Unknown"},
+                            #             ],
+                            #             value="",
+                            #             id="cluster-select",
+                            #             style={"width": "100%", "backgroundColor": "#ffffff", "color": "black"}  # Dropdown background color
+                            #         ),
+                            #     ],
+                            #     style={"marginBottom": "10px"}
+                            # ),
+                        ],
+                        width=2,  # Width for dropdowns column
+                        style={"paddingRight": "10px"}  # Add some spacing on the right side
+                    ),
+                    # Column for Map, Graphs, and Text Boxes
+                    dbc.Col(
+                        [
+                            dbc.Row(
+                                [
+                                    dbc.Col(
                                         [
-                                            dl.TileLayer(),
-                                            dl.GeoJSON(
-                                                data=json.loads(
-                                                    gdf_regional_impacts["geometry"].to_json()
-                                                ),
-                                                id="map-region-impact",
-                                                # zoomToBounds=True,
-                                                zoomToBoundsOnClick=True,
-                                                style=dict(
-                                                    weight=2,
-                                                    opacity=1,
-                                                    color="red",
-                                                    fillOpacity=0.5,
-                                                    # colorscale=colorscale,
-                                                ),
-                                            )
+                                            dl.Map(
+                                                [
+                                                    dl.TileLayer(),
+                                                    dl.GeoJSON(
+                                                        data=datasets.map_layers(project_name, "pdna-regional-impacts")[map_layer_zoom(MAP_ZOOM)],
+                                                        id="pdna-regions",
+                                                        # zoomToBounds=True,
+                                                        zoomToBoundsOnClick=True,
+                                                        style=dict(
+                                                            weight=2,
+                                                            opacity=1,
+                                                            color="red",
+                                                            fillOpacity=0.5,
+                                                            # colorscale=colorscale,
+                                                        ),
+                                                    ),
+                                                    # the WMS layers of the selected hazards
+                                                    dl.LayerGroup(id="pdna-hazard-layers"),
+                                                ],
+                                                style={"height": "60vh"},
+                                                zoom=MAP_ZOOM,
+                                                center=(-16, -170),  # Central coordinates for the Pacific region
+                                                id="pdna-map",
+                                                viewport={"center": [-16, -170], "zoom": MAP_ZOOM},  # Track the map's viewport
+                                            ),
+                                            # the simplification level of the regions on the map
+                                            dcc.Store(id="pdna-map-level", data=map_layer_zoom(MAP_ZOOM)),
                                         ],
-                                        style={"height": "60vh"},
-                                        zoom=5,
-                                        center=(-16, -170),  # Central coordinates for the Pacific region
-                                        id="pdna-map",
-                                        viewport={"center": [-16, -170], "zoom": 5},  # Track the map's viewport
+                                        width=6  # Width for the map column
                                     ),
-                                    width=6  # Width for the map column
-                                ),
-                                dbc.Col(
-                                    [
-                                        dcc.Graph(
-                                            id="exposure",
-                                            style={"height": "32vh"}
-                                        ),
-                                        html.Div(
+                                    dbc.Col(
+                                        [
                                             dcc.Graph(
-                                                id="loss-and-damage",
+                                                id="exposure",
                                                 style={"height": "32vh"}
                                             ),
-                                            style={"marginTop": "10px"}  # Space between the two graphs
-                                        ),
-                                    ],
-                                    width=3  # Width for the graph column
-                                ),
-                                # Column for Text Boxes
-                                dbc.Col(
-                                    [
-                                        html.Div(
-                                            [
-                                                html.H5("National Level Exposure Summary (#):", style={"color": "black"}),
-                                                html.Div(id="national-summary-text", style={"color": "black", "height": "22vh"}),
-                                                dcc.Interval(
-                                                    id="interval-component",
-                                                    interval=1*5000000,  # Adjust the interval as needed
-                                                    n_intervals=0
-                                                ),
-                                            ],
-                                            style={"padding": "10px", "backgroundColor": "#ffffff", "marginBottom": "10px"}
-                                        ),
-                                        html.Div(
-                                            [
-                                                html.H5("National Level Damage Summary ($USD):", style={"color": "black"}),
-                                                html.Div(id="damage-summary-text", style={"color": "black", "height": "24vh"}),
-                                                dcc.Interval(
-                                                    id="interval-component",
-                                                    interval=1*5000000,  # Adjust the interval as needed
-                                                    n_intervals=0
+                                            html.Div(
+                                                dcc.Graph(
+                                                    id="loss-and-damage",
+                                                    style={"height": "32vh"}
                                                 ),
-                                            ],
-                                            style={"padding": "10px", "backgroundColor": "#ffffff"}
-                                        ),
-                                    ],
-                                    width=3  # Width for the text boxes column
-                                ),
-                            ],
-                            style={"marginBottom": "10px"}
-                        ),
-                    ],
-                    width=10,  # Width for the map, graph and textbox column
-                ),
-            ],
-            style={"padding": "10px"}  # Add padding around the row
-        ),
-    ],
-    style={"backgroundColor": "#eaeded", "color": "white", "padding": "20px"}  # gray background and for the entire page
-)
-
-
+                                                style={"marginTop": "10px"}  # Space between the two graphs
+                                            ),
+                                        ],
+                                        width=3  # Width for the graph column
+                                    ),
+                                    # Column for Text Boxes
+                                    dbc.Col(
+                                        [
+                                            html.Div(
+                                                [
+                                                    html.H5("National Level Exposure Summary (#):", style={"color": "black"}),
+                                                    html.Div(national_summary(), id="national-summary-text", style={"color": "black", "height": "22vh"}),
+                                                ],
+                                                style={"padding": "10px", "backgroundColor": "#ffffff", "marginBottom": "10px"}
+                                            ),
+                                            html.Div(
+                                                [
+                                                    html.H5("National Level Damage Summary ($USD):", style={"color": "black"}),
+                                                    html.Div(loss_damage_summary(), id="damage-summary-text", style={"color": "black", "height": "24vh"}),
+                                                    # the version of the summaries shown, checked for a newer one while the page is visible
+                                                    dcc.Store(id="pdna-summary-version", data=summary_version()),
+                                                    dcc.Interval(id="pdna-refresh", interval=SUMMARY_REFRESH_SECONDS * 1000, disabled=not SUMMARY_REFRESH_SECONDS),
+                                                    dcc.Store(id="pdna-refresh-tick"),
+                                                ],
+                                                style={"padding": "10px", "backgroundColor": "#ffffff"}
+                                            ),
+                                        ],
+                                        width=3  # Width for the text boxes column
+                                    ),
+                                ],
+                                style={"marginBottom": "10px"}
+                            ),
+                        ],
+                        width=10,  # Width for the map, graph and textbox column
+                    ),
+                ],
+                style={"padding": "10px"}  # Add padding around the row
+            ),
+        ],
+        style={"backgroundColor": "#eaeded", "color": "white", "padding": "20px"}  # gray background and for the entire page
+    )
@@ -1,5 +1,6 @@
 import dash
-from dash import Dash, html, dcc, callback, Output, Input
+from dash import Dash, html, dcc, callback, clientside_callback, ctx, ClientsideFunction, Output, Input, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import geopandas as gpd
@@ -7,188 +8,195 @@ import pandas as pd
 import dash_leaflet as dl
 import dash_leaflet.express as dlx
 import json
-from collections import OrderedDict
+import threading
+from html import escape
+from riskscape_data import datasets, frame_size, hover_info, map_layer_zoom
+from riskscape_figures import cached_figure
+from riskscape_tiles import tile_index, visible_features
 
 dash.register_page(__name__)
 
 
-project_name = "cook-islands"
+# countries in the Country dropdown and the project holding each one's outputs
+COUNTRIES = {
+    "Cook Islands": "cook-islands",
+    "Marshall Islands": "rmi",
+    "Samoa": "samoa",
+    "Tuvalu": "tuvalu",
+    "Vanuatu": "vanuatu",
+}
+DEFAULT_COUNTRY = "Cook Islands"
 
 ############################### LOAD DATA AND PREPARE DATA ###############################
 
-#load regional summary
-gdf_regional_summary = gpd.read_file(
-    "data/" + project_name + "/" + "full-probabilistic-slr-regional-summary.geojson"
-)
-# rename regional summary columns for display
-gdf_regional_summary.rename(
-    columns={"Change.Average_Annual_Population_Exposed": "Change.Population_Exposed"},
-    inplace=True,
-)
+SLR_DATASETS = ("slr-regional-summary", "slr-average-loss", "slr-regional-average-loss")
 
-# #regional impact
-# gdf_regional_impact = gpd.read_file(
-#     "data/"
-#     + project_name
-#     + "/"
-#     + "full-probabilistic-slr-regional-impact-ari100.geojson"
-# )
-
-#load average loss
-df_average_loss = pd.read_csv(
-    "data/" + project_name + "/" + "full-probabilistic-slr-average-loss.csv"
-)
-#filter average loss for ssp245
-df_average_loss_245 = df_average_loss[df_average_loss["Scenario"] == 'ssp245 (medium confidence)']
 
-#load regional average loss
-df_regional_average_loss = pd.read_csv(
-    "data/" + project_name + "/" + "full-probabilistic-slr-regional-average-loss.csv"
-)
-#filter regional average loss for ssp245
-df_regional_average_loss_245 = df_regional_average_loss[df_regional_average_loss["Scenario"] == 'ssp245 (medium confidence)']
+# datasets are loaded through the shared registry the first time a country is
+# shown. What the page derives from them is cached with them, within the
+# registry's budget, until its outputs change, so switching back to a country
+# is a lookup rather than a reload.
+def load_data(project):
+    def load():
+        data = prepare_data(project)
+        return data, data_size(data)
+    return datasets.cached(
+        (project, "slr-regional-summary", "page_data"), datasets.version(project, *SLR_DATASETS), load
+    )
+
 
-# #national loss curve
-# gdf_national_loss_curve = gpd.read_file(
-#    "data/" + project_name + "/" + "coastal-slr-risk-national-loss-curve.geojson"
-# )
+def data_size(data):
+    # the map layers are the registry's own, counted with it
+    size = frame_size(data["gdf_regional_summary"])
+    size += 4 * len(json.dumps([data["regions"], data["hover_info"], data["region_map_layers"]]))
+    for name in ("figure_regional_average_loss", "figure_average_loss"):
+        size += 4 * len(data[name].to_json())
+    return size
 
 
+def prepare_data(project):
+    #load regional summary, renaming columns for display
+    gdf_regional_summary = datasets.get(project, "slr-regional-summary").rename(
+        columns={"Change.Average_Annual_Population_Exposed": "Change.Population_Exposed"},
+    )
 
-############################### DROPDOWN SELECTION CONFIGURATION ###############################
+    # #regional impact
+    # gdf_regional_impact = gpd.read_file(
+    #     "data/"
+    #     + project_name
+    #     + "/"
+    #     + "full-probabilistic-slr-regional-impact-ari100.geojson"
+    # )
+
+    #filter average loss for ssp245
+    df_average_loss = datasets.get(project, "slr-average-loss")
+    df_average_loss_245 = df_average_loss[df_average_loss["Scenario"] == 'ssp245 (medium confidence)']
+
+    #filter regional average loss for ssp245
+    df_regional_average_loss = datasets.get(project, "slr-regional-average-loss")
+    df_regional_average_loss_245 = df_regional_average_loss[df_regional_average_loss["Scenario"] == 'ssp245 (medium confidence)']
+
+    # #national loss curve
+    # gdf_national_loss_curve = gpd.read_file(
+    #    "data/" + project_name + "/" + "coastal-slr-risk-national-loss-curve.geojson"
+    # )
+
+    # create region list for region selection dropdown
+    regions = gdf_regional_summary["Region"].tolist()
+    regions.sort()
+    regions = ['All regions'] + regions
+
+    # map of every region, centred on the country, and of each region on its own,
+    # at each level of simplification
+    map_layers = datasets.map_layers(project, "slr-regional-summary")
+    region_map_layers = {
+        level: split_regions(layer, gdf_regional_summary["Region"]) for level, layer in map_layers.items()
+    }
+    centroid = datasets.metadata(project, "slr-regional-summary")["centroid"]
+    center = (centroid[1], centroid[0])
+
+    figure_regional_average_loss = px.histogram(
+        df_regional_average_loss_245,
+        x="Region",
+        y=[
+            #"Total_AAL",
+            "Building_AAL",
+            "Crops_AAL",
+            "Road_AAL",
+            "Infrastructure_AAL",
+            # "Average_Annual_Population_Exposed",
+        ],
+        histfunc="avg",
+    ).update_layout(xaxis_title="Province", yaxis_title="Avg. Loss USD")
 
-# create region list for region selection dropdown
-regions = gdf_regional_summary["Region"].tolist()
-regions.sort()
-regions = ['All regions'] + regions
+    figure_average_loss = px.line(
+        df_average_loss_245,
+        x="Year",
+        y=[
+            "Total_AAL",
+            "Building_AAL",
+            "Crops_AAL",
+            "Road_AAL",
+            "Infrastructure_AAL"
+            # "Average_Annual_Population_Exposed",
+        ],
+        markers=True,
+    ).update_layout(xaxis_title="Year", yaxis_title="Loss USD")
+
+    return {
+        "gdf_regional_summary": gdf_regional_summary,
+        "regions": regions,
+        "hover_info": hover_info(gdf_regional_summary, "Regional Summary", "Region", INFO_FIELDS, decimals=2),
+        "map_layers": map_layers,
+        "region_map_layers": region_map_layers,
+        "center": center,
+        "figure_regional_average_loss": figure_regional_average_loss,
+        "figure_average_loss": figure_average_loss,
+    }
+
+
+def split_regions(map_data, regions):
+    """Split a feature collection into one per region, regions naming each feature's region."""
+    region_map_data = {}
+    for region, feature in zip(regions, map_data["features"]):
+        region_map_data.setdefault(region, {"type": "FeatureCollection", "features": []})["features"].append(feature)
+    for region_data in region_map_data.values():
+        bboxes = [feature["bbox"] for feature in region_data["features"]]
+        region_data["bbox"] = [min(b[0] for b in bboxes), min(b[1] for b in bboxes), max(b[2] for b in bboxes), max(b[3] for b in bboxes)]
+    return region_map_data
+
+
+def preload():
+    """Prepare every country with outputs, so the first switch to one is a lookup.
+
+    Run in the background once the page is first opened, or before the
+    workers of a production server are forked so they all share the result.
+    """
+    for project in COUNTRIES.values():
+        if datasets.exists(project, "slr-regional-summary"):
+            load_data(project)
+        if datasets.exists(project, "slr-buildings-impact"):
+            tile_index(project, "slr-buildings-impact")
 
 
 
 ############################### MAP COMPONENT ###############################
 
 # mapinfo
+MAP_ZOOM = 6
+# zoom from which the buildings in view are drawn
+BUILDINGS_ZOOM = 14
+# what the tooltip of a building shows, and how each value is formatted. Outputs
+# with a column per scenario, eg SLR_0cm_ARI100.Depth, show their first one
+BUILDING_FIELDS = [
+    ("Use", "UseType", "{}"),
+    ("Value (USD)", "Value", "{:,.0f}"),
+    ("Flood Depth (m)", "Depth", "{:.2f}"),
+    ("Loss (USD)", "Loss", "{:,.0f}"),
+]
 colorscale = ["red", "yellow", "green", "blue", "purple"]  # rainbow
 
 
 
 ############################### MAP FEATURE INFO BOX ###############################
-def get_info(feature=None):
-    header = [html.B("Regional Summary")]
-    if not feature:
-        return header + [html.P("N/A")]
-    id = feature["id"]
-    print(id)
-    # print(feature)
-    # print("\r\n")
-    # r = gdf_regional_summary.iloc[[int(id)]]["Region"].values[0]
-
-    return header + [
-        html.P(gdf_regional_summary.iloc[[int(id)]]["Region"].values[0]),
-        html.Div(
-            [
-                html.Table(
-                    [
-                        html.Tr(
-                            [
-                                html.Td("Change.Total_AAL : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Total_AAL"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.Tr(
-                            [
-                                html.Td("Change.Building_AAL : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Building_AAL"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.Tr(
-                            [
-                                html.Td("Change.Crops_AAL : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Crops_AAL"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.Tr(
-                            [
-                                html.Td("Change.Road_AAL : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Road_AAL"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.Tr(
-                            [
-                                html.Td("Change.Infrastructure_AAL : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Infrastructure_AAL"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                        html.Tr(
-                            [
-                                html.Td("Change.Population_Exposed : "),
-                                html.Td(
-                                    str(
-                                        round(
-                                            gdf_regional_summary.iloc[[int(id)]][
-                                                "Change.Population_Exposed"
-                                            ].values[0],
-                                            2,
-                                        )
-                                    )
-                                ),
-                            ]
-                        ),
-                    ],
-                    style={"border": "1px solid black"},
-                ),
-            ],
-            style={"textAlign": "left"},
-        ),
+
+# rows of the info box of the region under the pointer, rendered in the browser
+# from the lookup prepared with each country's data
+INFO_FIELDS = [
+    (column + " : ", column)
+    for column in [
+        "Change.Total_AAL",
+        "Change.Building_AAL",
+        "Change.Crops_AAL",
+        "Change.Road_AAL",
+        "Change.Infrastructure_AAL",
+        "Change.Population_Exposed",
     ]
+]
 
 
 info = html.Div(
-    children=get_info(),
+    children=[html.B("Regional Summary"), html.P("N/A")],
     id="info",
     className="info",
     style={
@@ -205,192 +213,274 @@ info = html.Div(
 
 ############################### DASHBOARD LAYOUT ###############################
 
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(html.H3("Sea Level Rise (SLR)", style={"textAlign": "center"}))
-        ),
-        dbc.Row(
-            [
-                dbc.Col(
-                    [
-                        html.Label("Country : ", style={"textAlign": "right"}),
-                    ],
-                    width=1,  # Adjust width as needed
-                    style={"textAlign": "center"}  # Align label to the right
-                ),
-                dbc.Col(
-                    [
-                        dcc.Dropdown(
-                            options=[
-                                {"label": "Cook Islands", "value": "Cook Islands"},
-                                {"label": "Marshall Islands", "value": "Marshall Islands"},
-                                {"label": "Samoa", "value": "Samoa"},
-                                {"label": "Tuvalu", "value": "Tuvalu"},
-                                {"label": "Vanuatu", "value": "Vanuatu"},
-                            ],
-                            value="Cook Islands",
-                            id="country-select",
-                            style={"width": "100%"}  # Adjust width as needed
-                        ),
-                    ],
-                    width=3,  # Adjust width as needed
-                    align="center"  # Center align the content
-                ),
-                dbc.Col(
-                    [
-                        html.Label("Region : ", style={"textAlign": "right"}),
-                    ],
-                    width=3,  # Adjust width as needed
-                    style={"textAlign": "right"}  # Align label to the right
-                ),
-                dbc.Col(
-                    [
-                        dcc.Dropdown(
-                            options=[{"label": region, "value": region} for region in regions],
-                            value="All regions",
-                            id="region-select",
-                            style={"width": "100%"}  # Adjust width as needed
-                        ),
-                    ],
-                    width=3,  # Adjust width as needed
-                    align="center"  # Center align the content
-                ),
-            ],
-            justify="center",  # Center align the row content
-            style={"marginBottom": "10px"}  # Add margin to the row
-        ),
-        dbc.Row(html.Br()),
-        dbc.Row(
-            [
-                dbc.Col(html.B("Impact By Region")),
-                dbc.Col(html.B("AAL Change Between 2020 And 2150 By Region (ssp245)")),
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dl.Map(
+_warming = threading.Lock()
+_warmed = False
+
+
+def layout(**kwargs):
+    global _warmed
+    data = load_data(COUNTRIES[DEFAULT_COUNTRY])
+    regions = data["regions"]
+
+    # prepare the other countries in the background once the page is first opened
+    with _warming:
+        if not _warmed:
+            _warmed = True
+            threading.Thread(target=preload, daemon=True).start()
+
+    return html.Div(
+        [
+            # the simplification level of the regions on the map
+            dcc.Store(id="slr-map-level", data=map_layer_zoom(MAP_ZOOM)),
+            # the map's view while it is zoomed in to the buildings, None further out
+            dcc.Store(id="slr-buildings-zoom", data=BUILDINGS_ZOOM),
+            dcc.Store(id="slr-buildings-view"),
+            # what the info box shows for each region of the country
+            dcc.Store(id="slr-hover-info", data=data["hover_info"]),
+            dbc.Row(
+                dbc.Col(html.H3("Sea Level Rise (SLR)", style={"textAlign": "center"}))
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
                         [
-                            # dl.TileLayer(
-                            #    url="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}"
-                            # ),
-                            dl.TileLayer(),
-                            dl.GeoJSON(
-                                data=json.loads(
-                                   gdf_regional_summary["geometry"].to_json()
-                                ),
-                                id="map-region-impact",
-                                zoomToBounds=True,
-                                zoomToBoundsOnClick=True,
-                                style=dict(
-                                    weight=2,
-                                    opacity=1,
-                                    color="red",
-                                    fillOpacity=0.5,
-                                    colorscale=colorscale,
-                                ),
+                            html.Label("Country : ", style={"textAlign": "right"}),
+                        ],
+                        width=1,  # Adjust width as needed
+                        style={"textAlign": "center"}  # Align label to the right
+                    ),
+                    dbc.Col(
+                        [
+                            dcc.Dropdown(
+                                options=[{"label": country, "value": country} for country in COUNTRIES],
+                                value=DEFAULT_COUNTRY,
+                                id="country-select",
+                                clearable=False,
+                                style={"width": "100%"}  # Adjust width as needed
                             ),
-                            info,
                         ],
-                        zoom=6,
-                        style={"height": "40vh"},
-                        center=(
-                            gdf_regional_summary.dissolve().centroid.y.values[0].item(),
-                            gdf_regional_summary.dissolve().centroid.x.values[0].item(),
-                        ),
-                    )
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        id="graph-regional-summary",
-                        style={"height": "40vh"},
-                    )
-                ),
-            ]
-        ),
-        dbc.Row(html.Br()),
-        dbc.Row(
-            [
-                dbc.Col(html.B("AAL by Province (ssp245) averaged over 130 years")),
-                dbc.Col(html.B("National Loss Curve (ssp245)")),
-            ]
-        ),
-        dbc.Row(
-            [
-                # dbc.Col(html.H3("sdsdd")),
-                dbc.Col(
-                    dcc.Graph(
-                        # id="graph-regional-loss-curve",
-                        style={"height": "40vh"},
-                        figure=px.histogram(
-                            df_regional_average_loss_245,
-                            x="Region",
-                            y=[
-                                #"Total_AAL",
-                                "Building_AAL",
-                                "Crops_AAL",
-                                "Road_AAL",
-                                "Infrastructure_AAL",
-                                # "Average_Annual_Population_Exposed",
-                            ],
-                            histfunc="avg",
-                        ).update_layout(xaxis_title="Province", yaxis_title="Avg. Loss USD"),
-                    )
-                ),
-                dbc.Col(
-                    dcc.Graph(
-                        # id="graph-national-loss-curve",
-                        figure=px.line(
-                            df_average_loss_245,
-                            x="Year",
-                            y=[
-                                "Total_AAL",
-                                "Building_AAL",
-                                "Crops_AAL",
-                                "Road_AAL",
-                                "Infrastructure_AAL"
-                                # "Average_Annual_Population_Exposed",
+                        width=3,  # Adjust width as needed
+                        align="center"  # Center align the content
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Region : ", style={"textAlign": "right"}),
+                        ],
+                        width=3,  # Adjust width as needed
+                        style={"textAlign": "right"}  # Align label to the right
+                    ),
+                    dbc.Col(
+                        [
+                            dcc.Dropdown(
+                                options=[{"label": region, "value": region} for region in regions],
+                                value="All regions",
+                                id="region-select",
+                                style={"width": "100%"}  # Adjust width as needed
+                            ),
+                        ],
+                        width=3,  # Adjust width as needed
+                        align="center"  # Center align the content
+                    ),
+                ],
+                justify="center",  # Center align the row content
+                style={"marginBottom": "10px"}  # Add margin to the row
+            ),
+            dbc.Row(html.Br()),
+            dbc.Row(
+                [
+                    dbc.Col(html.B("Impact By Region")),
+                    dbc.Col(html.B("AAL Change Between 2020 And 2150 By Region (ssp245)")),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dl.Map(
+                            [
+                                # dl.TileLayer(
+                                #    url="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}"
+                                # ),
+                                dl.TileLayer(),
+                                dl.GeoJSON(
+                                    data=data["map_layers"][map_layer_zoom(MAP_ZOOM)],
+                                    id="map-region-impact",
+                                    zoomToBounds=True,
+                                    zoomToBoundsOnClick=True,
+                                    style=dict(
+                                        weight=2,
+                                        opacity=1,
+                                        color="red",
+                                        fillOpacity=0.5,
+                                        colorscale=colorscale,
+                                    ),
+                                ),
+                                # buildings in view, filled in once the map is zoomed in to them
+                                dl.GeoJSON(
+                                    id="slr-buildings",
+                                    style=dict(weight=1, opacity=1, color="black", fillOpacity=0.6),
+                                ),
+                                info,
                             ],
-                            markers=True,
-                        ).update_layout(xaxis_title="Year", yaxis_title="Loss USD"),
-                        style={"height": "40vh"},
-                    )
-                ),
-            ]
-        ),
-    ],
-    style={"textAlign": "center", "backgroundColor": "#eaeded", "color": "black", "padding": "20px"}
-)
+                            id="slr-map",
+                            zoom=MAP_ZOOM,
+                            style={"height": "40vh"},
+                            center=data["center"],
+                        )
+                    ),
+                    dbc.Col(
+                        dcc.Graph(
+                            id="graph-regional-summary",
+                            style={"height": "40vh"},
+                        )
+                    ),
+                ]
+            ),
+            dbc.Row(html.Br()),
+            dbc.Row(
+                [
+                    dbc.Col(html.B("AAL by Province (ssp245) averaged over 130 years")),
+                    dbc.Col(html.B("National Loss Curve (ssp245)")),
+                ]
+            ),
+            dbc.Row(
+                [
+                    # dbc.Col(html.H3("sdsdd")),
+                    dbc.Col(
+                        dcc.Graph(
+                            id="graph-regional-loss-curve",
+                            style={"height": "40vh"},
+                        )
+                    ),
+                    dbc.Col(
+                        dcc.Graph(
+                            id="graph-national-loss-curve",
+                            style={"height": "40vh"},
+                        )
+                    ),
+                ]
+            ),
+        ],
+        style={"textAlign": "center", "backgroundColor": "#eaeded", "color": "black", "padding": "20px"}
+    )
 
 
 
 ############################### CALLBACKS ###############################
 
-#map: zoom map to selected region 
-@callback(Output("map-region-impact", "data"), Input("region-select", "value"))
-def update_map(value):
+#country: list the selected country's regions
+@callback(
+    Output("region-select", "options"),
+    Output("region-select", "value"),
+    Input("country-select", "value"),
+)
+def update_regions(country):
+    regions = load_data(COUNTRIES[country])["regions"]
+    return [{"label": region, "value": region} for region in regions], "All regions"
+
+#country: loss graphs of the selected country
+@callback(
+    Output("graph-regional-loss-curve", "figure"),
+    Output("graph-national-loss-curve", "figure"),
+    Input("country-select", "value"),
+)
+def update_country_graphs(country):
+    data = load_data(COUNTRIES[country])
+    return data["figure_regional_average_loss"], data["figure_average_loss"]
+
+#map: zoom map to selected region, sending regions simplified to suit the map's zoom
+@callback(
+    Output("map-region-impact", "data"),
+    Output("map-region-impact", "zoomToBounds"),
+    Output("slr-map-level", "data"),
+    Input("country-select", "value"),
+    Input("region-select", "value"),
+    Input("slr-map", "zoom"),
+    State("slr-map-level", "data"),
+)
+def update_map(country, value, zoom, served_level):
+    level = map_layer_zoom(zoom)
+    zoomed = ctx.triggered_id == "slr-map"
+    if zoomed and level == served_level:
+        raise PreventUpdate
+    data = load_data(COUNTRIES[country])
     if value == 'All regions':
-        gdf_regional_summary_filtered = gdf_regional_summary
+        map_data = data["map_layers"][level]
     else:
-        gdf_regional_summary_filtered = gdf_regional_summary[
-            gdf_regional_summary["Region"] == value
-        ]
-    data = json.loads(
-        gdf_regional_summary_filtered["geometry"].to_json(),
-        object_pairs_hook=OrderedDict,
-    )
-
-    return data
+        map_data = data["region_map_layers"][level].get(value, {"type": "FeatureCollection", "features": []})
+    # the map only zooms to the regions when they are newly selected, not when the user zooms
+    return map_data, not zoomed, level
+
+#map: pass the view on to the buildings layer only once zoomed in far enough to tell them
+#apart, in the browser, so moving the map further out makes no requests
+clientside_callback(
+    ClientsideFunction(namespace="riskscape", function_name="map_view"),
+    Output("slr-buildings-view", "data"),
+    Input("slr-map", "bounds"),
+    Input("slr-map", "zoom"),
+    State("slr-buildings-zoom", "data"),
+    State("slr-buildings-view", "data"),
+)
 
-#map: retrieve feature info for info box
-@callback(Output("info", "children"), Input("map-region-impact", "hoverData"))
-def info_hover(feature):
-    return get_info(feature)
+#map: draw the selected country's buildings in view, with their impacts in a tooltip
+@callback(
+    Output("slr-buildings", "data"),
+    Input("country-select", "value"),
+    Input("slr-buildings-view", "data"),
+    prevent_initial_call=True,
+)
+def update_buildings(country, view):
+    project = COUNTRIES[country]
+    if view is None:
+        # the buildings were cleared when the map was zoomed out
+        if ctx.triggered_id != "slr-buildings-view":
+            raise PreventUpdate
+        return {"type": "FeatureCollection", "features": []}
+    if not datasets.exists(project, "slr-buildings-impact"):
+        return {"type": "FeatureCollection", "features": []}
+    fields = building_fields(datasets.get(project, "slr-buildings-impact").columns)
+    columns = [column for _, column, _ in fields]
+    buildings = visible_features(project, "slr-buildings-impact", view["bounds"], columns)
+    for feature in buildings["features"]:
+        properties = feature["properties"]
+        properties["tooltip"] = "<br>".join(
+            f"<b>{label}:</b> " + escape(form.format(properties[column]))
+            for label, column, form in fields
+            if column in properties
+        )
+    return buildings
+
+
+def building_fields(columns):
+    """Return BUILDING_FIELDS with the column of an output holding each value."""
+    fields = []
+    for label, column, form in BUILDING_FIELDS:
+        if column not in columns:
+            column = next((name for name in columns if name.endswith("." + column)), column)
+        fields.append((label, column, form))
+    return fields
+
+#map: info box lookup of the selected country
+@callback(Output("slr-hover-info", "data"), Input("country-select", "value"), prevent_initial_call=True)
+def update_hover_info(country):
+    return load_data(COUNTRIES[country])["hover_info"]
+
+#map: show feature info in the info box, in the browser
+clientside_callback(
+    ClientsideFunction(namespace="riskscape", function_name="info_box"),
+    Output("info", "children"),
+    Input("map-region-impact", "hoverData"),
+    State("slr-hover-info", "data"),
+)
 
 #regional summary graph: display data from selected region
-@callback(Output("graph-regional-summary", "figure"), Input("region-select", "value"))
-def update_graph_regional_summary(value):
+@callback(
+    Output("graph-regional-summary", "figure"),
+    Input("country-select", "value"),
+    Input("region-select", "value"),
+)
+@cached_figure(lambda country, value: datasets.version(COUNTRIES[country], "slr-regional-summary"))
+def update_graph_regional_summary(country, value):
+    gdf_regional_summary = load_data(COUNTRIES[country])["gdf_regional_summary"]
     # print(value)
     if value == None: #this is a bit of a hack - value is never None, but this way the empty grpah looks nicest for now
         gdf_regional_summary_filtered = gdf_regional_summary
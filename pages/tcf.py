@@ -1,5 +1,6 @@
 import dash
-from dash import Dash, html, dcc, callback, Output, Input
+from dash import Dash, html, dcc, callback, clientside_callback, ClientsideFunction, Output, Input, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import geopandas as gpd
@@ -9,6 +10,7 @@ import dash_leaflet.express as dlx
 import dash_dangerously_set_inner_html
 import json
 from dash import Dash, dash_table
+from riskscape_data import datasets, hover_info, map_layer_zoom
 
 dash.register_page(__name__)
 
@@ -21,77 +23,39 @@ project_name = "tc_meena_cookislands"
 # This would eventually have to be done dynamically when lookign at teh country entry to dashboards, or someother filter
 
 
-# data for the map
-gdf_regional_exposure = gpd.read_file(
-    # "data/" + "vanuatu" + "/" + "jtwc-forecast-regional-exposure.geojson"
-    "data/rsmc-tcwc/" + project_name + "/" + "rapid-exposure-forecast-regional-impacts.geojson"
-)
-gdf_cyclone_track = gpd.read_file(
-    "data/rsmc-tcwc/" + project_name + "/" + "rapid-exposure-forecast-cyclone-track.geojson"
-)
-# data
-# df_regional_summary = pd.read_csv(
-#     "data/" + "vanuatu" + "/" + "jtwc-forecast-regional-summary.csv"
-# )
-df_total_exposed = pd.read_csv(
-    "data/rsmc-tcwc/" + project_name + "/" + "rapid-exposure-forecast-total-exposed-by-country.csv"
-)
+# datasets are loaded through the shared registry the first time the page is
+# opened or a callback needs them, eg: datasets.get(project, "tcf-cyclone-track")
+project = "rsmc-tcwc/" + project_name
 
-df_total_exposed_by_windspeed = pd.read_csv(
-    "data/rsmc-tcwc/" + project_name + "/" + "rapid-exposure-forecast-total-by-windspeed-SK.csv"
-)
+# zoom the map opens at, which decides how simplified the regions first sent are
+MAP_ZOOM = 6
 
 
 # Base URL for the GeoServer WMS
 GEOSERVER_URL = "https://nexus.pacificdata.org/geoserver/geonode/wms"
 
 
-def get_info(feature=None):
-    header = [html.B("Regional Exposure")]
-    if not feature:
-        return header + [html.P("N/A")]
-    
-    id = feature["id"]
-    
-    # print(id)
+# rows of the info box of the region under the pointer, rendered in the browser
+INFO_FIELDS = [
+    ("Buildings Exposed (#): ", "Exposed_Buildings"),
+    ("Population Affected (#): ", "Exposed_Population"),
+    ("Max Windspeed (km/h) : ", "Max_WindSpeed_kmph"),
+    ("Min Windspeed (km/h) : ", "Min_WindSpeed_kmph"),
+]
 
-    return header + [
-        html.P(gdf_regional_exposure.iloc[[int(id)]]["Region.Region"].values[0]),
-        html.Div(
-            [
-                dash_dangerously_set_inner_html.DangerouslySetInnerHTML(
-                    f"""
-        
-        <table style='border: 1px'>
-          <tr>
-           <td>Buildings Exposed (#): </td/>
-           <td>{gdf_regional_exposure.iloc[[int(id)]]["Exposed_Buildings"].values[0]}</td/>
-          </tr>
-          <tr>
-           <td>Population Affected (#): </td/>
-           <td>{gdf_regional_exposure.iloc[[int(id)]]["Exposed_Population"].values[0]}</td/>
-          </tr>
-          <tr>
-           <td>Max Windspeed (km/h) : </td/>
-           <td>{gdf_regional_exposure.iloc[[int(id)]]["Max_WindSpeed_kmph"].values[0]}</td/>
-          </tr>
-          <tr>
-           <td>Min Windspeed (km/h) : </td/>
-           <td>{gdf_regional_exposure.iloc[[int(id)]]["Min_WindSpeed_kmph"].values[0]}</td/>
-          </tr>
-        </table>
 
-    """
-                ),
-            ],
-            style={"textAlign": "left"},
-        ),
-    ]
-    return header
+def regional_exposure_info():
+    """Return the info box lookup of the regions, prepared once per version of the output."""
+    def load():
+        frame = datasets.get(project, "tcf-regional-exposure")
+        info = hover_info(frame, "Regional Exposure", "Region.Region", INFO_FIELDS)
+        return info, 4 * len(json.dumps(info))
+    kind = "tcf-regional-exposure"
+    return datasets.cached((project, kind, "hover_info"), datasets.version(project, kind), load)
 
 
 info = html.Div(
-    children=get_info(),
+    children=[html.B("Regional Exposure"), html.P("N/A")],
     id="info-tc",
     className="info",
     style={
@@ -104,163 +68,194 @@ info = html.Div(
 )
 
 
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(
-                html.H3(
-                    "Rapid Exposure Forecase for Tropical Cyclone Scenarios",
-                    style={"textAlign": "center"},
-                )
-            )
-        ),
-        dbc.Row(html.Br()),
-        dbc.Row(
-            [
-                dbc.Col(html.Label("Tropical Cyclone : "), width=3),
+def preload():
+    """Load what the page shows, eg before the workers of a production server are forked."""
+    if not datasets.exists(project, "tcf-regional-exposure"):
+        return
+    datasets.metadata(project, "tcf-regional-exposure")
+    datasets.map_layers(project, "tcf-regional-exposure")
+    regional_exposure_info()
+    for kind in ("tcf-cyclone-track", "tcf-total-exposed-by-windspeed"):
+        datasets.get(project, kind)
+
+
+def layout(**kwargs):
+    centroid = datasets.metadata(project, "tcf-regional-exposure")["centroid"]
+    gdf_cyclone_track = datasets.get(project, "tcf-cyclone-track")
+    df_total_exposed_by_windspeed = datasets.get(project, "tcf-total-exposed-by-windspeed")
+
+    return html.Div(
+        [
+            # the simplification level of the regions on the map
+            dcc.Store(id="tcf-map-level", data=map_layer_zoom(MAP_ZOOM)),
+            # what the info box shows for each region
+            dcc.Store(id="tcf-hover-info", data=regional_exposure_info()),
+            dbc.Row(
                 dbc.Col(
-                    dcc.Dropdown(
-                        ["TC Lola (Vanuatu)", "TC Meena (Cook Islands)", "Tonga", "Samoa"],
-                        "TC Meena (Cook Islands)",
-                        id="country-select",
+                    html.H3(
+                        "Rapid Exposure Forecase for Tropical Cyclone Scenarios",
+                        style={"textAlign": "center"},
+                    )
+                )
+            ),
+            dbc.Row(html.Br()),
+            dbc.Row(
+                [
+                    dbc.Col(html.Label("Tropical Cyclone : "), width=3),
+                    dbc.Col(
+                        dcc.Dropdown(
+                            ["TC Lola (Vanuatu)", "TC Meena (Cook Islands)", "Tonga", "Samoa"],
+                            "TC Meena (Cook Islands)",
+                            id="country-select",
+                        ),
+                        width=6,
                     ),
-                    width=6,
-                ),
-            ]
-        ),
-        dbc.Row(html.Br()),
-        dbc.Row(
-            [
-                dbc.Col(html.B("Regional Exposure and Track Path")),
-                dbc.Col(html.B("")),
-            ]
-        ),
-        dbc.Row(
-            [
-                dbc.Col(
-                    dl.Map(
-                        [
-                            dl.TileLayer(),
-                            dl.GeoJSON(
-                                id="map-regional-exposure",
-                                data=json.loads(
-                                    gdf_regional_exposure["geometry"].to_json(),
+                ]
+            ),
+            dbc.Row(html.Br()),
+            dbc.Row(
+                [
+                    dbc.Col(html.B("Regional Exposure and Track Path")),
+                    dbc.Col(html.B("")),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dl.Map(
+                            [
+                                dl.TileLayer(),
+                                dl.GeoJSON(
+                                    id="map-regional-exposure",
+                                    data=datasets.map_layers(project, "tcf-regional-exposure")[map_layer_zoom(MAP_ZOOM)],
+                                    zoomToBounds=True,
+                                    zoomToBoundsOnClick=True,
+                                    style=dict(
+                                        weight=2,
+                                        opacity=1,
+                                        color="red",
+                                        fillOpacity=0.5,
+                                    ),
                                 ),
-                                zoomToBounds=True,
-                                zoomToBoundsOnClick=True,
-                                style=dict(
-                                    weight=2,
-                                    opacity=1,
-                                    color="red",
-                                    fillOpacity=0.5,
+                                dl.GeoJSON(
+                                    data=json.loads(
+                                        gdf_cyclone_track["geometry"].to_json()
+                                    ),
+                                    zoomToBounds=True,
+                                    zoomToBoundsOnClick=True,
+                                    style=dict(
+                                        weight=3,
+                                        opacity=1,
+                                        color="grey",
+                                        fillOpacity=0.5,
+                                    ),
                                 ),
-                            ),
-                            dl.GeoJSON(
-                                data=json.loads(
-                                    gdf_cyclone_track["geometry"].to_json()
-                                ),
-                                zoomToBounds=True,
-                                zoomToBoundsOnClick=True,
-                                style=dict(
-                                    weight=3,
-                                    opacity=1,
-                                    color="grey",
-                                    fillOpacity=0.5,
-                                ),
-                            ),
-                            dl.WMSTileLayer(
-                                url=GEOSERVER_URL,
-                                layers="geonode:ref_tc_meena_cook_islands_track_distance", 	
-                                format="image/png",
-                                transparent=True,
-                                id="cyclone-track-distance-layer"
+                                dl.WMSTileLayer(
+                                    url=GEOSERVER_URL,
+                                    layers="geonode:ref_tc_meena_cook_islands_track_distance", 	
+                                    format="image/png",
+                                    transparent=True,
+                                    id="cyclone-track-distance-layer"
 
+                                    ),
+                                info,
+                            ],
+                            id="tcf-map",
+                            zoom=MAP_ZOOM,
+                            style={"height": "100vh"},
+                            center=(centroid[1], centroid[0]),
+                        )
+                    ),
+                    dbc.Col(
+                        dbc.Row(
+                            [
+                                # bar chart - buildings per windspeed
+                                html.B("Buildings Exposed by Windspeed"),
+                                dcc.Graph(
+                                    figure=px.histogram(
+                                        df_total_exposed_by_windspeed,
+                                        x='Danger',
+                                        y="Buildings",
+                                        histfunc="sum",
+                                        color="Danger",
+                                    ).update_layout(
+                                        xaxis_title="Maximum Windspeed (Km/h)",
+                                        yaxis_title="No. Of Buildings Exposed",
+                                        showlegend=False
+                                    ),
+                                    style={"height": "30vh"}
                                 ),
-                            info,
-                        ],
-                        zoom=6,
-                        style={"height": "100vh"},
-                        center=(
-                            gdf_regional_exposure.dissolve()
-                            .centroid.y.values[0]
-                            .item(),
-                            gdf_regional_exposure.dissolve()
-                            .centroid.x.values[0]
-                            .item(),
-                        ),
-                    )
-                ),
-                dbc.Col(
-                    dbc.Row(
-                        [
-                            # bar chart - buildings per windspeed
-                            html.B("Buildings Exposed by Windspeed"),
-                            dcc.Graph(
-                                figure=px.histogram(
-                                    df_total_exposed_by_windspeed,
-                                    x='Danger',
-                                    y="Buildings",
-                                    histfunc="sum",
-                                    color="Danger",
-                                ).update_layout(
-                                    xaxis_title="Maximum Windspeed (Km/h)",
-                                    yaxis_title="No. Of Buildings Exposed",
-                                    showlegend=False
-                                ),
-                                style={"height": "30vh"}
-                            ),
-                            # bar chart - population per windspeed
-                            html.B("Population Exposed by Windspeed"),
-                            dcc.Graph(
-                                figure=px.histogram(
-                                    df_total_exposed_by_windspeed,
-                                    x="Danger",
-                                    y="Population",
-                                    histfunc="sum",
-                                    color="Danger",
-                                ).update_layout(
-                                    xaxis_title="Maximum Windspeed (Km/h)",
-                                    yaxis_title="Population Exposed",
-                                    showlegend=False
+                                # bar chart - population per windspeed
+                                html.B("Population Exposed by Windspeed"),
+                                dcc.Graph(
+                                    figure=px.histogram(
+                                        df_total_exposed_by_windspeed,
+                                        x="Danger",
+                                        y="Population",
+                                        histfunc="sum",
+                                        color="Danger",
+                                    ).update_layout(
+                                        xaxis_title="Maximum Windspeed (Km/h)",
+                                        yaxis_title="Population Exposed",
+                                        showlegend=False
+                                    ),
+                                    style={"height": "30vh"},
                                 ),
-                                style={"height": "30vh"},
-                            ),
-                            html.B("Exposed Building Value by Windspeed"),
-                            dcc.Graph(
-                                figure=px.bar(
-                                    df_total_exposed_by_windspeed,
-                                    x="Danger",
-                                    y="Building_Value",
-                                    # barmode="group",
-                                    color="Danger",
-                                ).update_layout(
-                                    xaxis_title="Windspeed",
-                                    yaxis_title="Exposed Building Value (USD)",
-                                    showlegend=False
+                                html.B("Exposed Building Value by Windspeed"),
+                                dcc.Graph(
+                                    figure=px.bar(
+                                        df_total_exposed_by_windspeed,
+                                        x="Danger",
+                                        y="Building_Value",
+                                        # barmode="group",
+                                        color="Danger",
+                                    ).update_layout(
+                                        xaxis_title="Windspeed",
+                                        yaxis_title="Exposed Building Value (USD)",
+                                        showlegend=False
+                                    ),
+                                    style={"height": "40vh"},
                                 ),
-                                style={"height": "40vh"},
-                            ),
-                        ]
-                    )
-                ),
-            ]
-        ),
-        # dbc.Row(
-        #     [
-        #         html.B("Forecasted Total Exposed"),
-        #         # bar chart - total value nation
-        #         dash_table.DataTable(
-        #             df_total_exposed.to_dict("records"),
-        #             [{"name": i, "id": i} for i in df_total_exposed.columns],
-        #         ),
-        #     ]
-        # ),
-    ],
-    # style={"textAlign": "center"},
-    style={"backgroundColor": "#eaeded", "color": "black", "padding": "20px"}  # gray background and for the entire page
+                            ]
+                        )
+                    ),
+                ]
+            ),
+            # dbc.Row(
+            #     [
+            #         html.B("Forecasted Total Exposed"),
+            #         # bar chart - total value nation
+            #         dash_table.DataTable(
+            #             df_total_exposed.to_dict("records"),
+            #             [{"name": i, "id": i} for i in df_total_exposed.columns],
+            #         ),
+            #     ]
+            # ),
+        ],
+        # style={"textAlign": "center"},
+        style={"backgroundColor": "#eaeded", "color": "black", "padding": "20px"}  # gray background and for the entire page
+    )
+
+
+clientside_callback(
+    ClientsideFunction(namespace="riskscape", function_name="info_box"),
+    Output("info-tc", "children"),
+    Input("map-regional-exposure", "hoverData"),
+    State("tcf-hover-info", "data"),
 )
 
 
-@callback(Output("info-tc", "children"), Input("map-regional-exposure", "hoverData"))
-def info_hover(feature):
-    return get_info(feature)
+# send the regions simplified to suit the map's zoom, without zooming the map back to them
+@callback(
+    Output("map-regional-exposure", "data"),
+    Output("map-regional-exposure", "zoomToBounds"),
+    Output("tcf-map-level", "data"),
+    Input("tcf-map", "zoom"),
+    State("tcf-map-level", "data"),
+    prevent_initial_call=True,
+)
+def update_map_level(zoom, served_level):
+    level = map_layer_zoom(zoom)
+    if level == served_level:
+        raise PreventUpdate
+    return datasets.map_layers(project, "tcf-regional-exposure")[level], False, level
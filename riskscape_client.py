@@ -0,0 +1,162 @@
+import requests
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+import warnings
+warnings.filterwarnings('ignore')
+
+load_dotenv()
+
+RISKSCAPE_API = os.getenv('RISKSCAPE_API') or "https://riskscape.nz/api"
+RISKSCAPE_USERNAME = os.getenv('RISKSCAPE_USERNAME')
+RISKSCAPE_PASSWORD = os.getenv('RISKSCAPE_PASSWORD')
+
+# where tokens are kept between script runs, readable by the owner only
+TOKEN_CACHE_PATH = os.getenv('RISKSCAPE_TOKEN_CACHE', os.path.expanduser("~/.riskscape_token.json"))
+# lifetime assumed for a token that does not carry its own expiry
+TOKEN_TTL = int(os.getenv('RISKSCAPE_TOKEN_TTL', '3600'))
+# requests per second across every thread using a client, 0 for no limit
+RATE_LIMIT = float(os.getenv('RISKSCAPE_RATE_LIMIT', '0'))
+# tokens this close to expiry are renewed before use rather than mid-request
+TOKEN_MARGIN = 60
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def token_expiry(token):
+    """Return the expiry time of a JWT token, or None if it carries none."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class RiskscapeClient:
+    """Authenticated, connection-pooled access to the Riskscape API.
+
+    The token is fetched once, kept in memory and in TOKEN_CACHE_PATH so later
+    runs of any script reuse it, renewed shortly before it expires and again
+    if the API rejects it with a 401. Requests are spaced to at most rate_limit
+    per second.
+    """
+
+    def __init__(self, api_url=RISKSCAPE_API, username=RISKSCAPE_USERNAME, password=RISKSCAPE_PASSWORD, pool_size=10, rate_limit=RATE_LIMIT):
+        self.api_url = api_url
+        self.username = username
+        self.password = password
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.verify = False
+        self._token = None
+        self._expires = 0
+        self._lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self._next_request = 0
+        self._rate_lock = threading.Lock()
+
+    def _wait_for_rate_limit(self):
+        if not self.rate_limit:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + 1 / self.rate_limit
+        if wait > 0:
+            time.sleep(wait)
+
+    def _cache_key(self):
+        return f"{self.api_url} {self.username}"
+
+    def _load_cached_token(self):
+        if not os.path.exists(TOKEN_CACHE_PATH):
+            return None, 0
+        try:
+            with open(TOKEN_CACHE_PATH) as file:
+                cached = json.load(file).get(self._cache_key())
+        except (OSError, ValueError):
+            return None, 0
+        if not cached:
+            return None, 0
+        return cached["token"], cached["expires"]
+
+    def _save_cached_token(self):
+        cache = {}
+        if os.path.exists(TOKEN_CACHE_PATH):
+            try:
+                with open(TOKEN_CACHE_PATH) as file:
+                    cache = json.load(file)
+            except (OSError, ValueError):
+                cache = {}
+        cache[self._cache_key()] = {"token": self._token, "expires": self._expires}
+        dir_path = os.path.dirname(os.path.abspath(TOKEN_CACHE_PATH))
+        fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=".part")
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, TOKEN_CACHE_PATH)
+
+    def _login(self):
+        self._wait_for_rate_limit()
+        response = self.session.post(
+            f"{self.api_url}/token",
+            json={"usernameOrEmail": self.username, "password": self.password},
+        )
+        response.raise_for_status()
+        self._token = response.text
+        self._expires = token_expiry(self._token) or time.time() + TOKEN_TTL
+        self._save_cached_token()
+
+    def token(self, rejected=None):
+        """Return a usable token, logging in only when no valid one is cached.
+
+        Passing the token the API rejected forces a new login, unless another
+        thread has already replaced it.
+        """
+        with self._lock:
+            if rejected is not None and rejected == self._token:
+                self._login()
+            elif self._token is None or self._expires - TOKEN_MARGIN < time.time():
+                self._token, self._expires = self._load_cached_token()
+                if self._token is None or self._expires - TOKEN_MARGIN < time.time():
+                    self._login()
+            return self._token
+
+    def get(self, url, headers=None, **kwargs):
+        """GET an API path or absolute url, renewing the token once on a 401."""
+        if not url.startswith(("http://", "https://")):
+            url = self.api_url + url
+        token = self.token()
+        self._wait_for_rate_limit()
+        response = self.session.get(url, headers=dict(headers or {}, **{"rs-api-token": token}), **kwargs)
+        if response.status_code == 401:
+            response.close()
+            token = self.token(rejected=token)
+            self._wait_for_rate_limit()
+            response = self.session.get(url, headers=dict(headers or {}, **{"rs-api-token": token}), **kwargs)
+        return response
+
+    def get_json(self, path):
+        response = self.get(path)
+        response.raise_for_status()
+        return response.json()
+
+
+def get_client(pool_size=10):
+    """Return the process-wide client, so every caller shares its token and pool.
+
+    pool_size only applies to the call that creates the client.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RiskscapeClient(pool_size=pool_size)
+        return _client
@@ -0,0 +1,625 @@
+import json
+import math
+import os, sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import geopandas as gpd
+import numpy as np
+import shapely
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:  # conversion is skipped and the loaders read the originals
+    pyarrow = None
+
+load_dotenv()
+
+# downloaded outputs that are converted, by how they are read
+SPATIAL_EXTENSIONS = (".geojson", ".gpkg")
+TABLE_EXTENSIONS = (".csv",)
+
+# suffix added to a spatial output's file name for its columnar copy
+CONVERTED_EXTENSION = ".parquet"
+# suffix added to a tabular output's file name for its columnar copy, an
+# uncompressed Arrow IPC (Feather) file the dashboards memory-map
+TABLE_CONVERTED_EXTENSION = ".arrow"
+# suffix of outputs the downloader stored gzip compressed
+COMPRESSED_EXTENSION = ".gz"
+# suffix added to an output's file name for its metadata sidecar
+METADATA_EXTENSION = ".meta.json"
+
+# directory holding one subdirectory of outputs per project
+DATA_ROOT = os.getenv("RISKSCAPE_DATA", "data")
+# memory the dashboards may use for loaded datasets before the least recently used are dropped
+DATASET_CACHE_MB = int(os.getenv("RISKSCAPE_DATASET_CACHE_MB", "1024"))
+# seconds between checks for replaced outputs by a running dashboard, 0 to not check
+DATASET_WATCH_SECONDS = float(os.getenv("RISKSCAPE_WATCH_SECONDS", "5"))
+
+# map zooms a simplified copy of each map layer is prepared for, a map zoomed in
+# beyond the last is sent the full resolution geometry
+SIMPLIFY_ZOOMS = (4, 6, 8, 10, 12)
+
+# dataset kinds the dashboards use and the output each is read from in a project's
+# directory, or the outputs it may be read from, in order of preference
+DATASET_FILES = {
+    # sea level rise
+    "slr-regional-summary": "full-probabilistic-slr-regional-summary.geojson",
+    "slr-average-loss": "full-probabilistic-slr-average-loss.csv",
+    "slr-regional-average-loss": "full-probabilistic-slr-regional-average-loss.csv",
+    "slr-regional-impact": "full-probabilistic-slr-regional-impact.csv",
+    "slr-event-impact": "full-probabilistic-slr-event-impact.csv",
+    "slr-buildings-impact": (
+        "full-probabilistic-slr-buildings-impact.gpkg",
+        "full-probabilistic-slr-buildings-impact.geojson",
+        "buildings-impact.geojson",
+    ),
+    "slr-road-impact": "full-probabilistic-slr-road-impact.gpkg",
+    # tropical cyclone rapid exposure forecast
+    "tcf-regional-exposure": "rapid-exposure-forecast-regional-impacts.geojson",
+    "tcf-cyclone-track": "rapid-exposure-forecast-cyclone-track.geojson",
+    "tcf-total-exposed": "rapid-exposure-forecast-total-exposed-by-country.csv",
+    "tcf-total-exposed-by-windspeed": "rapid-exposure-forecast-total-by-windspeed-SK.csv",
+    # post disaster impact estimate
+    "pdna-damaged-buildings": "damaged-buildings.gpkg",
+    "pdna-damaged-roads": "damaged-roads.gpkg",
+    "pdna-exposure-by-cluster": "exposure-by-cluster.geojson",
+    "pdna-regional-impacts-by-sector": "regional-impacts-by-sector.geojson",
+    "pdna-regional-impacts": "regional-impacts.geojson",
+    "pdna-impact-by-asset-type": "impact-by-asset-type.csv",
+    "pdna-national-impact-by-sector": "national-impact-by-sector-SK.csv",
+    "pdna-national-summary": "national-summary.csv",
+    "pdna-regional-summary": "regional-summary.csv",
+    "pdna-regional-summary-by-sector": "regional-summary-by-sector.csv",
+}
+
+
+def converted_path(file_path):
+    if file_path.endswith(TABLE_EXTENSIONS):
+        return file_path + TABLE_CONVERTED_EXTENSION
+    return file_path + CONVERTED_EXTENSION
+
+
+def metadata_path(file_path):
+    return file_path + METADATA_EXTENSION
+
+
+def source_path(file_path):
+    """Return where an output is stored, which is file_path or its .gz copy."""
+    if not os.path.exists(file_path) and os.path.exists(file_path + COMPRESSED_EXTENSION):
+        return file_path + COMPRESSED_EXTENSION
+    return file_path
+
+
+def is_current(path, file_path):
+    """Whether path, derived from the output file_path, is at least as new as it."""
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source_path(file_path))
+
+
+def is_converted(file_path):
+    """Whether file_path has a metadata sidecar and, with pyarrow, a columnar copy at least as new as itself."""
+    return is_current(metadata_path(file_path), file_path) and (
+        pyarrow is None or is_current(converted_path(file_path), file_path)
+    )
+
+
+def read_source_spatial(file_path):
+    path = source_path(file_path)
+    if path.endswith(COMPRESSED_EXTENSION):
+        path = "/vsigzip/" + path
+    return gpd.read_file(path)
+
+
+def geometry_centroid(geometries):
+    """Return the centroid of geometries taken together, as of their union, without the union.
+
+    Polygons are weighted by area and lines by length, so for outputs whose
+    regions do not overlap this matches dissolving them.
+    """
+    geometries = geometries[~shapely.is_empty(geometries) & ~shapely.is_missing(geometries)]
+    if not len(geometries):
+        return None
+    centroids = shapely.centroid(geometries)
+    weights = shapely.area(geometries)
+    if not weights.sum():
+        weights = shapely.length(geometries)
+    if not weights.sum():
+        weights = np.ones(len(geometries))
+    return [
+        float(np.average(shapely.get_x(centroids), weights=weights)),
+        float(np.average(shapely.get_y(centroids), weights=weights)),
+    ]
+
+
+def json_number(value):
+    """Return value as a JSON number, or None when it is missing."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def dataset_metadata(frame):
+    """Describe an output: its row count, column types and statistics and, if spatial,
+    its CRS, bounds [minx, miny, maxx, maxy] and centroid [x, y]."""
+    metadata = {"count": len(frame), "columns": {}}
+    for name, column in frame.items():
+        if isinstance(column.dtype, gpd.array.GeometryDtype):
+            continue
+        stats = {"type": str(column.dtype), "nulls": int(column.isna().sum())}
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            stats.update(
+                min=json_number(column.min()),
+                max=json_number(column.max()),
+                mean=json_number(column.mean()),
+                sum=json_number(column.sum()),
+            )
+        else:
+            stats["distinct"] = int(column.nunique())
+        metadata["columns"][name] = stats
+
+    if isinstance(frame, gpd.GeoDataFrame):
+        geometries = frame.geometry.values
+        metadata["crs"] = frame.crs.to_string() if frame.crs else None
+        metadata["bounds"] = [json_number(value) for value in frame.total_bounds] if len(frame) else None
+        metadata["centroid"] = geometry_centroid(np.asarray(geometries))
+    return metadata
+
+
+def write_metadata(file_path, frame):
+    """Write the metadata sidecar of the output file_path, loaded as frame."""
+    dir_path, file_name = os.path.split(metadata_path(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path or ".", prefix="." + file_name, suffix=".part")
+    try:
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(dataset_metadata(frame), file, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, metadata_path(file_path))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return metadata_path(file_path)
+
+
+def read_metadata(file_path):
+    """Return the metadata of an output, from its sidecar when that is current.
+
+    Outputs that were not ingested by the downloader get their sidecar
+    written here, on first use.
+    """
+    path = metadata_path(file_path)
+    if not is_current(path, file_path):
+        frame = read_spatial(file_path) if file_path.endswith(SPATIAL_EXTENSIONS) else read_table(file_path)
+        try:
+            write_metadata(file_path, frame)
+        except OSError:  # a read-only data directory
+            return dataset_metadata(frame)
+    with open(path) as file:
+        return json.load(file)
+
+
+def remove_stale_copy(file_path):
+    """Remove the Parquet copy of a tabular output, which its Arrow copy has replaced."""
+    if file_path.endswith(TABLE_EXTENSIONS) and os.path.exists(file_path + CONVERTED_EXTENSION):
+        os.remove(file_path + CONVERTED_EXTENSION)
+
+
+def categorize(frame):
+    """Return frame with its text columns of mostly repeated values, eg Region or Scenario, as categoricals."""
+    columns = {
+        name: frame[name].astype("category")
+        for name in frame.columns
+        if (pd.api.types.is_object_dtype(frame[name]) or pd.api.types.is_string_dtype(frame[name]))
+        and frame[name].nunique() <= len(frame) // 2
+    }
+    return frame.assign(**columns) if columns else frame
+
+
+def convert_output(file_path):
+    """Write a columnar copy of a downloaded output, and its metadata sidecar, next to it.
+
+    Spatial outputs are copied to GeoParquet, tables to Arrow IPC with their
+    repeated text columns dictionary encoded.
+
+    file_path names the output as the pages do, without any .gz suffix. Both
+    are written to a temporary file and renamed into place, so a page
+    loading at the same time sees either the old version or the new one.
+    Returns the converted path (the sidecar's without pyarrow), or None if
+    the file is not a convertible output.
+    """
+    if file_path.endswith(SPATIAL_EXTENSIONS):
+        frame = read_source_spatial(file_path)
+    elif file_path.endswith(TABLE_EXTENSIONS):
+        frame = pd.read_csv(source_path(file_path))
+    else:
+        return None
+    written = write_metadata(file_path, frame)
+    if pyarrow is None:
+        return written
+
+    dir_path, file_name = os.path.split(converted_path(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix="." + file_name, suffix=".part")
+    os.close(fd)
+    try:
+        if file_path.endswith(TABLE_EXTENSIONS):
+            # uncompressed, so readers can map the columns straight from the file
+            pyarrow.feather.write_feather(categorize(frame), tmp_path, compression="uncompressed")
+        else:
+            frame.to_parquet(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dir_path + "/" + file_name)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    remove_stale_copy(file_path)
+    return dir_path + "/" + file_name
+
+
+def convert_directory(dir_path):
+    """Convert every output under dir_path that has no up to date copy and sidecar.
+
+    An output that cannot be parsed is reported and left for the pages to read
+    as before, so one bad file does not hold up the rest.
+    """
+    converted = []
+    for root, dirs, files in os.walk(dir_path):
+        for file_name in sorted(files):
+            if file_name.endswith(COMPRESSED_EXTENSION):
+                file_name = file_name[:-len(COMPRESSED_EXTENSION)]
+            file_path = root + "/" + file_name
+            if file_name.startswith(".") or not file_name.endswith(SPATIAL_EXTENSIONS + TABLE_EXTENSIONS):
+                continue
+            if is_converted(file_path):
+                if pyarrow is not None:
+                    remove_stale_copy(file_path)
+                continue
+            try:
+                if convert_output(file_path):
+                    converted.append(file_path)
+            except Exception as e:
+                print(f"{file_path} not converted: {e}", file=sys.stderr)
+    return converted
+
+
+def read_spatial(file_path):
+    """Load a spatial output, preferring its GeoParquet copy when current.
+
+    The original is read whether it was stored plain or gzip compressed.
+    """
+    if pyarrow is not None and is_current(converted_path(file_path), file_path):
+        return gpd.read_parquet(converted_path(file_path))
+    return read_source_spatial(file_path)
+
+
+def read_table(file_path):
+    """Load a tabular output, preferring its Arrow copy when current.
+
+    The copy is memory-mapped and its numeric columns are used in place, so
+    loading takes no time and processes reading the same file share its pages.
+    """
+    if pyarrow is not None and is_current(converted_path(file_path), file_path):
+        table = pyarrow.feather.read_table(converted_path(file_path), memory_map=True)
+        return table.to_pandas(split_blocks=True)
+    return pd.read_csv(source_path(file_path))
+
+
+def pixel_degrees(zoom):
+    """Width in degrees of a web map pixel at the equator at zoom."""
+    return 360 / (256 * 2 ** zoom)
+
+
+def simplify_geometries(geometries, zoom):
+    """Simplify geometries to within half a pixel at zoom, rounding coordinates to a tenth of one.
+
+    Polygons that tile an area are simplified as a coverage so neighbouring
+    regions keep their shared boundary without gaps or overlaps; anything
+    else is simplified one geometry at a time, keeping each valid.
+    """
+    tolerance = pixel_degrees(zoom) / 2
+    polygonal = np.isin(shapely.get_type_id(geometries), (3, 6)).all()
+    if polygonal and shapely.coverage_is_valid(geometries):
+        simplified = shapely.coverage_simplify(geometries, tolerance)
+    else:
+        simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    decimals = math.ceil(-math.log10(pixel_degrees(zoom) / 10))
+    return shapely.transform(simplified, lambda coordinates: np.round(coordinates, decimals))
+
+
+def map_layers(frame):
+    """Return the GeoJSON of frame's geometry at each of SIMPLIFY_ZOOMS, and in full under None.
+
+    Features keep frame's index as their id, whatever the level.
+    """
+    if frame.crs is not None and not frame.crs.is_geographic:
+        frame = frame.to_crs(4326)
+    layers = {None: json.loads(frame.geometry.to_json())}
+    for zoom in SIMPLIFY_ZOOMS:
+        geometries = simplify_geometries(frame.geometry.values, zoom)
+        layers[zoom] = json.loads(gpd.GeoSeries(geometries, index=frame.index, crs=frame.crs).to_json())
+    return layers
+
+
+def map_layer_zoom(zoom):
+    """Return the map_layers level to send a map at zoom."""
+    for level in SIMPLIFY_ZOOMS:
+        if zoom <= level:
+            return level
+    return None
+
+
+def hover_info(frame, title, name_column, fields, decimals=None):
+    """Return what a map's info box shows for each feature of frame, keyed by feature id.
+
+    fields lists the (label, column) rows of the box. The lookup is sent to
+    the browser once with the map layer, where the riskscape.info_box
+    client-side callback (assets/info.js) renders the box for the feature
+    under the pointer.
+    """
+    columns = [column for _, column in fields]
+    values = frame[columns].round(decimals) if decimals is not None else frame[columns]
+    return {
+        "title": title,
+        "labels": [label for label, _ in fields],
+        "features": {
+            str(index): [str(name)] + [str(value) for value in row]
+            for index, name, row in zip(frame.index, frame[name_column], values.itertuples(index=False))
+        },
+    }
+
+
+def frame_size(frame):
+    """Approximate bytes held by a loaded (Geo)DataFrame, including its geometries."""
+    size = int(frame.memory_usage(deep=True).sum())
+    if isinstance(frame, gpd.GeoDataFrame):
+        for name in frame.columns[frame.dtypes == "geometry"]:
+            # coordinates dominate, GEOS adds roughly one more coordinate per geometry
+            geometries = frame[name].values
+            size += 16 * int(shapely.get_num_coordinates(geometries).sum() + len(geometries))
+    return size
+
+
+class DatasetRegistry:
+    """Datasets of every project under data_root, loaded on demand and shared by the pages.
+
+    A dataset is named by its project directory, eg "cook-islands" or
+    "rsmc-tcwc/tc_meena_cookislands", and a kind from DATASET_FILES. Loaded
+    frames are kept until together they exceed max_bytes, then the least
+    recently used are dropped, and are reloaded once their output changes.
+    Callers share the cached frames and must not modify them in place. The
+    simplified map layers of spatial datasets are cached the same way.
+
+    With watch() running, replaced outputs are instead reloaded in the
+    background and swapped in once ready, see reload().
+    """
+
+    def __init__(self, data_root=DATA_ROOT, max_bytes=DATASET_CACHE_MB * 1024 * 1024):
+        self.data_root = data_root
+        self.max_bytes = max_bytes
+        self.size = 0
+        # values by (key, version), and the versions cached of each key
+        self._cache = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        # one lock per dataset being loaded, so concurrent callbacks read a file once
+        self._loading = {}
+        # while watching, the version of each (project, kind) the pages are served
+        self._watcher = None
+        self._served = {}
+        # set in the thread loading replaced outputs, which sees their new versions
+        self._reloading = threading.local()
+
+    def path(self, project, kind):
+        if kind not in DATASET_FILES:
+            raise KeyError(f"unknown dataset kind {kind!r}")
+        file_names = DATASET_FILES[kind]
+        if isinstance(file_names, str):
+            file_names = (file_names,)
+        paths = [self.data_root + "/" + project + "/" + file_name for file_name in file_names]
+        return next((path for path in paths if os.path.exists(source_path(path))), paths[0])
+
+    def version(self, project, *kinds):
+        """Return a value that changes whenever any of the outputs of kinds is replaced.
+
+        Pages key what they derive from datasets on this, so it is rebuilt
+        only when the data underneath changes. While watch() runs, it is the
+        version being served, which moves to a replaced output's once reload()
+        has prepared it.
+        """
+        if self._watcher is None or getattr(self._reloading, "active", False):
+            return max(self.output_version(project, kind) for kind in kinds)
+        with self._lock:
+            versions = [self._served.get((project, kind)) for kind in kinds]
+        for i, kind in enumerate(kinds):
+            if versions[i] is None:
+                version = self.output_version(project, kind)
+                with self._lock:
+                    versions[i] = self._served.setdefault((project, kind), version)
+        return max(versions)
+
+    def output_version(self, project, kind):
+        """Return the version of the output of kind now on disk."""
+        return os.stat(source_path(self.path(project, kind))).st_mtime_ns
+
+    def exists(self, project, kind):
+        return os.path.exists(source_path(self.path(project, kind)))
+
+    def projects(self, kind):
+        """Return the projects under data_root that have an output for kind."""
+        if not os.path.isdir(self.data_root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.data_root)
+            if not name.startswith(".") and self.exists(name, kind)
+        )
+
+    def get(self, project, kind):
+        """Return the dataset, loading it if it is not cached or its output has changed."""
+        def load():
+            path = self.path(project, kind)
+            frame = read_table(path) if path.endswith(TABLE_EXTENSIONS) else read_spatial(path)
+            return frame, frame_size(frame)
+        return self.cached((project, kind), self.version(project, kind), load)
+
+    def metadata(self, project, kind):
+        """Return read_metadata() of a dataset, eg its bounds and centroid, without loading it."""
+        def load():
+            metadata = read_metadata(self.path(project, kind))
+            return metadata, 4 * len(json.dumps(metadata))
+        return self.cached((project, kind, "metadata"), self.version(project, kind), load)
+
+    def map_layers(self, project, kind):
+        """Return map_layers() of a spatial dataset, prepared once per version of its output."""
+        def load():
+            layers = map_layers(self.get(project, kind))
+            # parsed JSON takes several times the memory of its text
+            return layers, 4 * len(json.dumps(layers))
+        return self.cached((project, kind, "map_layers"), self.version(project, kind), load)
+
+    def cached(self, key, version, load):
+        """Return the cached value of key if it is of version, otherwise load and cache it.
+
+        load returns the value and its approximate size in bytes. Values
+        derived from a dataset are keyed by a tuple starting with its project
+        and kind, so invalidate() and reload() drop them with it.
+        """
+        entry_key = (key, version)
+        with self._lock:
+            if entry_key in self._cache:
+                self._cache.move_to_end(entry_key)
+                self._prepared(entry_key)
+                return self._cache[entry_key][0]
+            loading = self._loading.setdefault(entry_key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                if entry_key in self._cache:
+                    self._cache.move_to_end(entry_key)
+                    self._prepared(entry_key)
+                    return self._cache[entry_key][0]
+            try:
+                value, size = load()
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(entry_key, None)
+                raise
+            with self._lock:
+                # the version replaced is kept while a reload is yet to swap it out
+                if self._watcher is None:
+                    for old_version in self._versions.get(key, set()) - {version}:
+                        self._drop((key, old_version))
+                self._cache[entry_key] = (value, size)
+                self._versions.setdefault(key, set()).add(version)
+                self.size += size
+                self._loading.pop(entry_key, None)
+                self._prepared(entry_key)
+                self._evict()
+        return value
+
+    def _prepared(self, entry_key):
+        # what reload() prepares is kept when it drops the versions it replaces
+        if getattr(self._reloading, "active", False):
+            self._reloading.prepared.add(entry_key)
+
+    def _drop(self, entry_key):
+        self.size -= self._cache.pop(entry_key)[1]
+        key, version = entry_key
+        self._versions[key].discard(version)
+        if not self._versions[key]:
+            del self._versions[key]
+
+    def _evict(self):
+        # the newest dataset is always kept, even when it alone is over budget
+        while self.size > self.max_bytes and len(self._cache) > 1:
+            self._drop(next(iter(self._cache)))
+
+    def invalidate(self, project=None):
+        """Drop the cached datasets and map layers of project, or of every project."""
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._cache if project is None or entry_key[0][0] == project]:
+                self._drop(entry_key)
+
+    def reload(self, prepare=None):
+        """Load the outputs replaced since they were first served, then serve them.
+
+        The replaced datasets are loaded, and prepare() run to rebuild what
+        the pages derive from them, in this thread, which sees their new
+        versions while every other thread is still served the old ones. The
+        new versions are then served all at once and the old values dropped.
+        Returns the (project, kind) of the outputs swapped in.
+        """
+        with self._lock:
+            served = dict(self._served)
+        changed = {}
+        for (project, kind), version in served.items():
+            try:
+                output_version = self.output_version(project, kind)
+            except OSError:  # removed, keep serving what was loaded
+                continue
+            if output_version != version:
+                changed[project, kind] = output_version
+        if not changed:
+            return []
+
+        self._reloading.prepared = set()
+        self._reloading.active = True
+        try:
+            for project, kind in changed:
+                with self._lock:
+                    loaded = (project, kind) in self._versions
+                if loaded:
+                    self.get(project, kind)
+            if prepare is not None:
+                prepare()
+        finally:
+            self._reloading.active = False
+
+        # values derived from several outputs are keyed on the newest of their
+        # versions, so every other version of what was prepared is dropped too
+        prepared = self._reloading.prepared
+        superseded = {key for key, version in prepared}
+        with self._lock:
+            self._served.update(changed)
+            for entry_key in list(self._cache):
+                key, version = entry_key
+                stale = key[:2] in changed and version != changed[key[:2]]
+                if (stale or key in superseded) and entry_key not in prepared:
+                    self._drop(entry_key)
+        return sorted(changed)
+
+    def watch(self, interval=DATASET_WATCH_SECONDS, prepare=None):
+        """Check for replaced outputs every interval seconds and reload() them in the background.
+
+        The dashboards then show a new run's outputs within seconds, without
+        a restart or a slow first request. Does nothing if already watching
+        or interval is 0.
+        """
+        if self._watcher is not None or not interval:
+            return
+        # datasets already loaded, eg preloaded before a server forked, are watched from the start
+        with self._lock:
+            for key, version in self._cache:
+                self._served.setdefault(key[:2], version)
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    for project, kind in self.reload(prepare):
+                        print(f"Reloaded {project} {kind}", file=sys.stderr)
+                except Exception as e:
+                    # the outputs may be part way through a sync, try again next time
+                    print(f"Reloading datasets failed: {e}", file=sys.stderr)
+        self._watcher = threading.Thread(target=watch, name="dataset-watcher", daemon=True)
+        self._watcher.start()
+
+
+# the registry the dashboard pages load their data through
+datasets = DatasetRegistry()
+
+
+if __name__ == "__main__":
+    # convert outputs already in data/, eg: python riskscape_data.py data/cook-islands
+    for dir_path in sys.argv[1:] or ["data"]:
+        for file_path in convert_directory(dir_path):
+            print(file_path)
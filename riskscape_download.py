@@ -1,9 +1,22 @@
 import requests
+import argparse
 import json
 import os, sys
+import base64
+import gzip
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
+from riskscape_client import get_client
+from riskscape_list_projects import CATALOG_WORKERS, load_catalog
 import warnings
-warnings.filterwarnings('ignore') 
+warnings.filterwarnings('ignore')
 
 load_dotenv()
 #project_name = "cook-islands"
@@ -11,99 +24,497 @@ project_name = "rsmc-tcwc"
 #project_name = "vanuatu"
 
 organisation = "partner"
-api_url = "https://riskscape.nz/api"
 
-RISKSCAPE_API = os.getenv('RISKSCAPE_API')
-RISKSCAPE_USERNAME = os.getenv('RISKSCAPE_USERNAME')
-RISKSCAPE_PASSWORD = os.getenv('RISKSCAPE_PASSWORD')
 GEONODE_API = os.getenv('GEONODE_API')
 GEONODE_USERNAME = os.getenv('GEONODE_USERNAME')
 GEONODE_PASSWORD = os.getenv('GEONODE_PASSWORD')
 
-# authenication token
-token_url = f"{api_url}/token"
-auth = {"usernameOrEmail": "sachindras", "password": "Daemon21!@"}
-response = requests.post(token_url, json=auth, verify=False)
-token = response.text
-# print(token)
+# number of outputs downloaded at the same time
+DOWNLOAD_WORKERS = int(os.getenv('RISKSCAPE_DOWNLOAD_WORKERS', '8'))
+# maximum open requests against any one host, whatever the worker count
+HOST_CONCURRENCY = int(os.getenv('RISKSCAPE_HOST_CONCURRENCY', '4'))
 
-#list projects
-#https://riskscape.nz/api/users/by-username/sachindras/projects/all
+# attempts made at each output before giving up, resuming from the partial file
+DOWNLOAD_ATTEMPTS = int(os.getenv('RISKSCAPE_DOWNLOAD_ATTEMPTS', '5'))
+# keep outputs gzip compressed on disk as <file>.gz, the pages read either form
+STORE_COMPRESSED = os.getenv('RISKSCAPE_STORE_COMPRESSED', '0') == '1'
+# (connect, read) seconds before a stalled request is abandoned and resumed
+REQUEST_TIMEOUT = (10, 60)
 
-# project information
-url = f"{api_url}/projects/by-slug/{organisation}/{project_name}"
-response = requests.get(url, headers={"rs-api-token": token}, verify=False)
-project_text = response.text
-#print(project_text)
-project = json.loads(project_text)
-#print(project)
-id = project["id"]
+# bytes read from the response per write, keeps memory flat for large outputs
+# and bounds what a dropped connection can lose from the partial file
+CHUNK_SIZE = 64 * 1024
 
-# recent runs
-url = f"{api_url}/projects/by-id/{str(id)}/runs/recent"
-response = requests.get(url, headers={"rs-api-token": token}, verify=False)
-model_run_text = response.text
-model_run = json.loads(model_run_text)
-print(model_run['totalSize'])
-#sys.exit() 
+# output media types that are downloaded and the extension they are stored with
+OUTPUT_EXTENSIONS = {
+    "application/geo+json": ".geojson",
+    "text/csv": ".csv",
+}
 
-limit = int(model_run['totalSize'])
+# per project record of what has been downloaded, kept next to the outputs
+MANIFEST_NAME = "manifest.json"
 
-for i in range(0, limit - 0): #multi-model downloads
+_host_limits = {}
+_host_limits_lock = threading.Lock()
 
-    model_name = model_run["list"][i]["externalModelId"]
-    print(model_name)
+
+def host_limit(url):
+    """Return the semaphore bounding concurrent requests to the host of url."""
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(HOST_CONCURRENCY)
+        return _host_limits[host]
+
+
+def output_file_name(model_name, output):
+    file_name = (
+        #project_name
+        #+ "_" +
+        model_name.lower()
+        + "_"
+        + output["name"].lower()
+        + OUTPUT_EXTENSIONS[output["mediaType"]]
+    )
+    return file_name.replace("_", "-")
+
+
+def load_manifest(data_dir_path):
+    """Return the manifest entries for a project keyed by file name."""
+    manifest_path = data_dir_path + "/" + MANIFEST_NAME
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def save_manifest(data_dir_path, manifest):
+    fd, tmp_path = tempfile.mkstemp(dir=data_dir_path, prefix=".", suffix=".part")
+    with os.fdopen(fd, mode="w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, data_dir_path + "/" + MANIFEST_NAME)
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, mode="rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stored_path(file_path):
+    """Return where the output named file_path is kept on disk."""
+    return file_path + ".gz" if STORE_COMPRESSED else file_path
+
+
+def is_unchanged(file_path, entry, download):
+    """Whether file_path still holds the output the manifest entry recorded.
+
+    The checksum is only recomputed when the size or modification time no
+    longer match, so an untouched file costs a single stat. An output stored
+    plain when it should be compressed, or the reverse, counts as changed.
+    """
+    if not entry or entry["uri"] != download["uri"] or entry["run_id"] != download["run_id"]:
+        return False
+    file_path = stored_path(file_path)
+    if entry.get("stored", os.path.basename(file_path)) != os.path.basename(file_path):
+        return False
+    if not os.path.exists(file_path):
+        return False
+    stat = os.stat(file_path)
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime == entry["mtime"]:
+        return True
+    if file_sha256(file_path) != entry["sha256"]:
+        return False
+    entry["mtime"] = stat.st_mtime
+    return True
+
+
+def list_downloads(api_url, model_run, data_dir_path):
+    """Map each destination file in data_dir_path to the output it comes from.
+
+    Runs are walked in the order the API lists them, so when two runs write the
+    same file the later one wins, as it did when they were downloaded serially.
+    """
+    downloads = {}
+    for run in model_run["list"]:
+        model_name = run["externalModelId"]
+        for output in run["outputs"]:
+            if output["mediaType"] not in OUTPUT_EXTENSIONS:
+                continue
+            file_path = data_dir_path + "/" + output_file_name(model_name, output)
+            downloads[file_path] = {
+                "url": api_url + output["uri"].replace("/api", "") + "/download",
+                "uri": output["uri"],
+                "run_id": run.get("id"),
+            }
+    return downloads
+
+
+def compress_file(source_path, gzip_path):
+    """Gzip source_path to gzip_path, renaming it into place once complete."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(gzip_path), prefix=".", suffix=".part")
+    try:
+        with open(source_path, mode="rb") as source, os.fdopen(fd, mode="wb") as file:
+            with gzip.GzipFile(fileobj=file, mode="wb", filename="", mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, CHUNK_SIZE)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, gzip_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def partial_paths(file_path):
+    """Return the paths of the partial download of file_path and its sidecar.
+
+    The sidecar records the url and validators the partial bytes came from, so
+    a later attempt only resumes when it is fetching the same representation.
+    """
+    dir_path, file_name = os.path.split(file_path)
+    part_path = dir_path + "/." + file_name + ".part"
+    return part_path, part_path + ".json"
+
+
+def load_partial(download, file_path):
+    """Return (offset, state) to resume file_path from, or (0, {}).
+
+    A partial whose sidecar cannot be read is discarded, so it is downloaded
+    again rather than failing every later run.
+    """
+    part_path, state_path = partial_paths(file_path)
+    if not (os.path.exists(part_path) and os.path.exists(state_path)):
+        return 0, {}
+    try:
+        with open(state_path) as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        discard_partial(file_path)
+        return 0, {}
+    if not isinstance(state, dict) or state.get("url") != download["url"]:
+        return 0, {}
+    return os.path.getsize(part_path), state
+
+
+def save_partial(file_path, state):
+    """Write the sidecar of file_path's partial download, renaming it into place once complete."""
+    part_path, state_path = partial_paths(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(state_path), prefix=".", suffix=".part")
+    try:
+        with os.fdopen(fd, mode="w") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, state_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def discard_partial(file_path):
+    """Remove file_path's partial download and its sidecar, if there are any."""
+    for path in partial_paths(file_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def expected_sha256(headers):
+    """Return the hex sha256 the server advertises for the output, if any."""
+    for name in ("Repr-Digest", "Digest"):
+        for digest in headers.get(name, "").split(","):
+            algorithm, _, value = digest.strip().partition("=")
+            if algorithm.lower() == "sha-256":
+                return base64.b64decode(value.strip(":")).hex()
+    return None
+
+
+class IncompleteDownload(requests.RequestException):
+    """The connection closed before the whole output was received."""
+
+
+class StalePartial(Exception):
+    """The partial download of an output is longer than the output now is."""
+
+
+class CorruptDownload(requests.RequestException):
+    """A completed output does not match the checksum the server advertised."""
+
+
+def fetch_output(client, download, file_path, entry):
+    """Make one attempt at fetching an output into its partial file.
+
+    Resumes from an existing partial file with a Range request, guarded by
+    If-Range so a changed output is sent whole rather than spliced. Returns the
+    partial download state on completion or None when the server reports the
+    output unchanged; raises IncompleteDownload if the transfer stops short.
+    """
+    part_path, state_path = partial_paths(file_path)
+    offset, state = load_partial(download, file_path)
+
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    if offset:
+        # the partial file holds decoded bytes, so continue in the identity encoding
+        headers["Accept-Encoding"] = "identity"
+        headers["Range"] = f"bytes={offset}-"
+        # If-Range needs a strong validator, servers weaken the ETag of gzipped responses
+        etag = state.get("etag")
+        validator = etag if etag and not etag.startswith("W/") else state.get("last_modified")
+        if validator:
+            headers["If-Range"] = validator
+    elif entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with host_limit(download["url"]):
+            with client.get(download["url"], headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                if response.status_code == 304:
+                    return None
+                if response.status_code == 416 and offset:
+                    # the partial is already whole if it is as long as the output, bytes */<length>
+                    length = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if length == str(offset) or offset == state.get("total"):
+                        return state
+                    raise StalePartial(f"partial of {offset} bytes is past the end of the output of {length}")
+                response.raise_for_status()
+
+                # with a Content-Encoding, Content-Length counts compressed bytes on the wire
+                encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+                wire_length = response.headers.get("Content-Length") if encoded else None
+                if response.status_code == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    # bytes <first>-<last>/<total>
+                    first, _, total = content_range.replace("bytes ", "").partition("-")
+                    if int(first) != offset:
+                        raise IncompleteDownload(f"server resumed at {first} instead of {offset}")
+                    total = total.partition("/")[2]
+                    mode = "ab"
+                else:
+                    offset = 0
+                    total = None if encoded else response.headers.get("Content-Length")
+                    mode = "wb"
+                total = int(total) if total and total != "*" else None
+
+                state = {
+                    "url": download["url"],
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "total": total,
+                    # a digest covers the bytes sent, which are not the decoded ones written under a Content-Encoding
+                    "sha256": (None if encoded else expected_sha256(response.headers)) or state.get("sha256"),
+                }
+                save_partial(file_path, state)
+
+                with open(part_path, mode=mode) as file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+                if wire_length is not None and response.raw.tell() != int(wire_length):
+                    raise IncompleteDownload(f"received {response.raw.tell()} of {wire_length} compressed bytes")
+    except StalePartial:
+        # the output has changed since, fetch it whole
+        discard_partial(file_path)
+        return fetch_output(client, download, file_path, entry)
+
+    received = os.path.getsize(part_path)
+    if total is not None and received != total:
+        raise IncompleteDownload(f"received {received} of {total} bytes")
+    return state
+
+
+def download_output(client, download, file_path, entry=None):
+    """Download an output to file_path, resuming across dropped connections.
+
+    Bytes are streamed in CHUNK_SIZE pieces to a partial file next to file_path
+    that survives failed attempts and later runs, and each retry continues from
+    where the last one stopped. Once the size, and the checksum when the server
+    advertises one, match what was promised the file is renamed into place, or
+    gzipped into place with RISKSCAPE_STORE_COMPRESSED, so readers only ever see
+    a whole file. When entry holds validators from an earlier download they are
+    sent as a conditional request. Returns the new manifest entry, or None if
+    the server reports the output unchanged.
+    """
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        try:
+            state = fetch_output(client, download, file_path, entry)
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, IncompleteDownload) as e:
+            if attempt == DOWNLOAD_ATTEMPTS:
+                raise
+            print(f"{os.path.basename(file_path)} interrupted ({e}), resuming", file=sys.stderr)
+            time.sleep(2 ** attempt)
+    if state is None:
+        return None
+
+    part_path, state_path = partial_paths(file_path)
+    sha256 = file_sha256(part_path)
+    if state["sha256"] and state["sha256"] != sha256:
+        os.remove(part_path)
+        os.remove(state_path)
+        raise CorruptDownload(f"checksum mismatch for {os.path.basename(file_path)}")
+    if STORE_COMPRESSED:
+        compress_file(part_path, stored_path(file_path))
+        os.remove(part_path)
+        sha256 = file_sha256(stored_path(file_path))
+        stale_path = file_path
+    else:
+        os.chmod(part_path, 0o644)
+        os.replace(part_path, file_path)
+        stale_path = file_path + ".gz"
+    # drop the other form only once the new one is in place
+    if os.path.exists(stale_path):
+        os.remove(stale_path)
+    os.remove(state_path)
+
+    stat = os.stat(stored_path(file_path))
+    return {
+        "run_id": download["run_id"],
+        "uri": download["uri"],
+        "stored": os.path.basename(stored_path(file_path)),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256,
+        "etag": state["etag"],
+        "last_modified": state["last_modified"],
+        "downloaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def download_all(client, downloads, manifest, executor):
+    """Download every output in downloads on the shared executor.
+
+    An output the manifest shows is already present and unchanged is revalidated
+    with a conditional request when the server gave it an ETag or Last-Modified,
+    and skipped without a request otherwise. Anything else is downloaded in full.
+    manifest is updated in place with each completed download. Returns the paths
+    that failed, for any reason, after every other download has finished.
+    """
+    failed = []
+    pending = {}
+    for file_path, download in downloads.items():
+        entry = manifest.get(os.path.basename(file_path))
+        if not is_unchanged(file_path, entry, download):
+            pending[file_path] = (download, None)
+        elif entry.get("etag") or entry.get("last_modified"):
+            pending[file_path] = (download, entry)
+
+    futures = {
+        executor.submit(download_output, client, download, file_path, entry): file_path
+        for file_path, (download, entry) in pending.items()
+    }
+    for future in as_completed(futures):
+        file_path = futures[future]
+        file_name = os.path.basename(file_path)
+        try:
+            entry = future.result()
+        except Exception as e:
+            print(f"{file_path} failed: {e}", file=sys.stderr)
+            failed.append(file_path)
+            continue
+        if entry is None:
+            print(f"{file_path} not modified")
+            continue
+        manifest[file_name] = entry
+        print(file_path)
+    return failed
+
+
+def sync_project(client, executor, group, project_slug, convert=True):
+    """Bring data/<project_slug> up to date with the project's recent runs.
+
+    Returns a report of the time taken, the outputs and bytes downloaded and
+    the outputs that failed.
+    """
+    started = time.monotonic()
+
+    # project information
+    project = client.get_json(f"/projects/by-slug/{group}/{project_slug}")
+    #print(project)
+    id = project["id"]
+
+    # recent runs
+    model_run = client.get_json(f"/projects/by-id/{str(id)}/runs/recent")
+    print(f"{project_slug}: {model_run['totalSize']} run(s) " + ", ".join(run["externalModelId"] for run in model_run["list"]))
 
     #create data directories
-    data_dir_path = "data/" + project_name
+    data_dir_path = "data/" + project_slug
     if not os.path.exists(data_dir_path):
         os.makedirs(data_dir_path)
 
-    #download spatial model outputs
-    for output in model_run["list"][i]["outputs"]:
-        if output["mediaType"] == "application/geo+json":
-            #print(output)
-            output_name = output["name"]
-            output_url = api_url + output["uri"].replace("/api", "") + "/download"
-            #print(output_url)
-            # download
-            file_name = (
-                #project_name
-                #+ "_" +
-                model_name.lower()
-                + "_"
-                + output_name.lower()
-                + ".geojson"
-            )
-            file_name = file_name.replace("_", "-")
-            print(file_name)
-            response = requests.get(output_url, headers={"rs-api-token": token}, verify=False)
-            # print(response.text)
-            with open("data/" + project_name + "/" + file_name, mode="wb") as file:
-                file.write(response.content)
-
-    #download tabular model outputs
-    for output in model_run["list"][i]["outputs"]:
-        if output["mediaType"] == "text/csv":
-            #print(output)
-            output_name = output["name"]
-            output_url = api_url + output["uri"].replace("/api", "") + "/download"
-            #print(output_url)
-            # download
-            file_name = (
-                #project_name
-                #+ "_" +
-                model_name.lower()
-                + "_"
-                + output_name.lower()
-                + ".csv"
-            )
-            file_name = file_name.replace("_", "-")
-            print(file_name)
-            response = requests.get(output_url, headers={"rs-api-token": token}, verify=False)
-            # print(response.text)
-            with open("data/" + project_name + "/" + file_name, mode="wb") as file:
-                file.write(response.content)
-
-
-print("Project/Model Run Outputs Downloaded.")
\ No newline at end of file
+    #download spatial and tabular model outputs
+    manifest = load_manifest(data_dir_path)
+    before = dict(manifest)
+    try:
+        failed = download_all(client, list_downloads(client.api_url, model_run, data_dir_path), manifest, executor)
+    finally:
+        save_manifest(data_dir_path, manifest)
+    downloaded = [entry for name, entry in manifest.items() if before.get(name) is not entry]
+
+    #convert outputs to a columnar format the dashboards load quickly
+    if convert:
+        # imported here so download-only runs do not pay for loading geopandas
+        from riskscape_data import convert_directory
+        for file_path in convert_directory(data_dir_path):
+            print(f"{file_path} converted")
+
+    return {
+        "project": project_slug,
+        "seconds": time.monotonic() - started,
+        "files": len(downloaded),
+        "bytes": sum(entry["size"] for entry in downloaded),
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the most recent model run outputs of one or more projects.")
+    parser.add_argument(
+        "projects", nargs="*", default=[project_name],
+        help=f"project slugs, or 'all' for every project in the catalog (default: {project_name})",
+    )
+    parser.add_argument("--no-convert", action="store_true", help="skip converting outputs to Parquet")
+    args = parser.parse_args()
+
+    # created before the catalog is loaded, which would otherwise create the shared client with its own pool size
+    client = get_client(pool_size=max(DOWNLOAD_WORKERS, CATALOG_WORKERS))
+
+    if args.projects == ["all"]:
+        projects = [(p["group"], p["slug"]) for p in load_catalog()["projects"] if "error" not in p]
+    else:
+        projects = [(organisation, slug) for slug in args.projects]
+    # a project named twice would be synced twice into the same files
+    projects = list(dict.fromkeys(projects))
+    if not projects:
+        sys.exit("No projects to download.")
+
+    # every project's outputs share one pool, so DOWNLOAD_WORKERS bounds the whole sync
+    reports = []
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor, ThreadPoolExecutor(max_workers=len(projects)) as project_executor:
+        futures = {
+            project_executor.submit(sync_project, client, executor, group, slug, not args.no_convert): slug
+            for group, slug in projects
+        }
+        for future in as_completed(futures):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                print(f"{futures[future]} failed: {e}", file=sys.stderr)
+                reports.append({"project": futures[future], "seconds": 0, "files": 0, "bytes": 0, "failed": None})
+
+    print(f"{'project':<24} {'seconds':>8} {'files':>6} {'MB':>8} {'failed':>6}")
+    for report in sorted(reports, key=lambda r: r["project"]):
+        failed = "all" if report["failed"] is None else len(report["failed"])
+        print(f"{report['project']:<24} {report['seconds']:>8.1f} {report['files']:>6} {report['bytes'] / 1024 / 1024:>8.2f} {failed:>6}")
+
+    failed_projects = [r["project"] for r in reports if r["failed"] is None or r["failed"]]
+    if failed_projects:
+        sys.exit(f"Downloads failed for: {', '.join(failed_projects)}")
+
+    print("Project/Model Run Outputs Downloaded.")
+
+
+if __name__ == "__main__":
+    main()
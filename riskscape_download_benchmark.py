@@ -0,0 +1,84 @@
+import argparse
+import os, sys
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from riskscape_mock_api import MockRiskscapeServer
+
+# Measures riskscape_download.py against the mock API at several worker counts.
+# Each level runs the downloader in a fresh process and an empty data directory,
+# so every output is transferred and peak RSS belongs to that run alone.
+#
+#   python riskscape_download_benchmark.py cook-islands --workers 1 4 8 --latency 0.05 --bandwidth 1000000
+
+DOWNLOAD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "riskscape_download.py")
+
+
+def directory_size(dir_path):
+    """Return (file count, total bytes) of the outputs downloaded to dir_path."""
+    files, size = 0, 0
+    for root, dirs, file_names in os.walk(dir_path):
+        for file_name in file_names:
+            if file_name.startswith(".") or file_name.endswith((".json", ".parquet", ".arrow")):
+                continue
+            files += 1
+            size += os.path.getsize(os.path.join(root, file_name))
+    return files, size
+
+
+def run_download(api_url, project, workers, host_concurrency):
+    """Run one download in a fresh process, returning (seconds, files, bytes, peak RSS in KB)."""
+    work_dir = tempfile.mkdtemp(prefix="riskscape-benchmark-")
+    env = dict(
+        os.environ,
+        RISKSCAPE_API=api_url,
+        RISKSCAPE_DOWNLOAD_WORKERS=str(workers),
+        RISKSCAPE_HOST_CONCURRENCY=str(host_concurrency or workers),
+        RISKSCAPE_TOKEN_CACHE=os.path.join(work_dir, "token.json"),
+    )
+    try:
+        started = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, DOWNLOAD_SCRIPT, project, "--no-convert"],
+            cwd=work_dir, env=env, stdout=subprocess.DEVNULL,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.monotonic() - started
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError(f"download failed with {workers} worker(s)")
+        files, size = directory_size(os.path.join(work_dir, "data", project))
+        # ru_maxrss is in kilobytes on Linux
+        return elapsed, files, size, usage.ru_maxrss
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark riskscape_download.py against the mock API.")
+    parser.add_argument("project", help="project directory under --data to download")
+    parser.add_argument("--data", default="data", help="directory served by the mock API")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="worker counts to measure")
+    parser.add_argument("--host-concurrency", type=int, default=0, help="per-host limit, defaults to the worker count")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock API adds to every response")
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes/sec per transfer, 0 for unlimited")
+    parser.add_argument("--no-compress", action="store_true", help="have the mock API send outputs uncompressed")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per worker count, the fastest is reported")
+    args = parser.parse_args()
+
+    server = MockRiskscapeServer(
+        ("127.0.0.1", 0), args.data, args.latency, args.bandwidth, not args.no_compress, quiet=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{'workers':>7} {'seconds':>8} {'files':>6} {'MB':>8} {'files/s':>8} {'MB/s':>8} {'peak RSS MB':>12}")
+    for workers in args.workers:
+        elapsed, files, size, rss = min(
+            run_download(server.api_url, args.project, workers, args.host_concurrency)
+            for _ in range(args.repeat)
+        )
+        mb = size / 1024 / 1024
+        print(f"{workers:>7} {elapsed:>8.2f} {files:>6} {mb:>8.2f} {files / elapsed:>8.1f} {mb / elapsed:>8.2f} {rss / 1024:>12.1f}")
+
+    server.shutdown()
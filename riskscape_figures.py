@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import plotly.io as pio
+from dotenv import load_dotenv
+
+# Figures returned by the dashboard callbacks, cached by callback, arguments and
+# the version of the data they are drawn from, so a repeated selection is a
+# lookup rather than a rebuild:
+#
+#   @callback(Output("graph", "figure"), Input("region-select", "value"))
+#   @cached_figure(lambda region: datasets.version(project, "slr-regional-summary"))
+#   def update_graph(region):
+#       ...
+
+load_dotenv()
+
+# memory the cached figures of a process may use before the least recently used are dropped
+FIGURE_CACHE_MB = int(os.getenv("RISKSCAPE_FIGURE_CACHE_MB", "64"))
+# directory shared by every worker of the dashboard, unset to cache in memory only
+FIGURE_CACHE_DIR = os.getenv("RISKSCAPE_FIGURE_CACHE_DIR") or None
+# size the shared directory is pruned back to, oldest figures first
+FIGURE_CACHE_DISK_MB = int(os.getenv("RISKSCAPE_FIGURE_CACHE_DISK_MB", "512"))
+
+
+class FigureCache:
+    """Serialized figures kept in memory up to max_bytes and, with cache_dir, on disk.
+
+    The disk copy lets the workers of a multi-process server share what any
+    of them has drawn. Figures are returned as the plain JSON structure Dash
+    sends, and callers must not modify them.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MB * 1024 * 1024, cache_dir=FIGURE_CACHE_DIR, max_disk_bytes=FIGURE_CACHE_DISK_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # one lock per figure being drawn, so concurrent requests draw it once
+        self._drawing = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key, draw):
+        """Return the figure cached under key, drawing it with draw() if there is none."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key][0]
+            drawing = self._drawing.setdefault(key, threading.Lock())
+
+        with drawing:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key][0]
+            try:
+                text = self._read(key)
+                if text is None:
+                    text = pio.to_json(draw(), validate=False)
+                    self._write(key, text)
+            except BaseException:
+                with self._lock:
+                    self._drawing.pop(key, None)
+                raise
+            figure = json.loads(text)
+            with self._lock:
+                self._cache[key] = (figure, len(text))
+                self.size += len(text)
+                self._drawing.pop(key, None)
+                while self.size > self.max_bytes and len(self._cache) > 1:
+                    _, (_, size) = self._cache.popitem(last=False)
+                    self.size -= size
+        return figure
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _read(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key)) as file:
+                text = file.read()
+        except OSError:
+            return None
+        try:
+            # keep recently used figures when pruning
+            os.utime(self._path(key))
+        except OSError:  # pruned by another worker since, the figure read is still good
+            pass
+        return text
+
+    def _write(self, key, text):
+        if not self.cache_dir:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".", suffix=".part")
+        with os.fdopen(fd, mode="w") as file:
+            file.write(text)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json") and not entry.name.startswith("."):
+                try:
+                    stat = entry.stat()
+                except OSError:  # removed by another worker
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Drop the figures cached in memory, as when their data has been replaced."""
+        with self._lock:
+            self._cache.clear()
+            self.size = 0
+
+
+# the cache the dashboard callbacks share
+figures = FigureCache()
+
+
+def cached_figure(version):
+    """Cache the figure a callback returns by its arguments and version(*arguments).
+
+    version returns what changes when the data behind the figure does,
+    normally DatasetRegistry.version() of the datasets it is drawn from.
+    """
+    def decorator(draw):
+        name = draw.__module__ + "." + draw.__qualname__
+
+        @functools.wraps(draw)
+        def wrapper(*args):
+            key = json.dumps([name, args, version(*args)], default=str)
+            return figures.get(hashlib.sha256(key.encode()).hexdigest(), lambda: draw(*args))
+        return wrapper
+    return decorator
@@ -1,39 +1,115 @@
-import requests
+import argparse
 import json
-import os
+import os, sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
 from dotenv import load_dotenv
+from riskscape_client import get_client, RISKSCAPE_USERNAME
 import warnings
-warnings.filterwarnings('ignore') 
+warnings.filterwarnings('ignore')
 
 load_dotenv()
 organisation = "partner-2"
 
-RISKSCAPE_API = os.getenv("RISKSCAPE_API")
-RISKSCAPE_USERNAME = os.getenv("RISKSCAPE_USERNAME")
-RISKSCAPE_PASSWORD = os.getenv("RISKSCAPE_PASSWORD")
 GEONODE_API = os.getenv("GEONODE_API")
 GEONODE_USERNAME = os.getenv("GEONODE_USERNAME")
 GEONODE_PASSWORD = os.getenv("GEONODE_PASSWORD")
-api_url = RISKSCAPE_API
-
-# authenication token
-token_url = f"{api_url}/token"
-auth = {"usernameOrEmail": "sachindras", "password": "Daemon21!@"}
-response = requests.post(token_url, json=auth, verify=False)
-token = response.text
-
-# project information
-url = f"{api_url}/users/by-username/{RISKSCAPE_USERNAME}/projects/all"
-response = requests.get(url, headers={"rs-api-token": token}, verify=False)
-project_text = response.text
-# print(project_text)
-projects = json.loads(project_text)
-print("id\tgroup\t\tname")
-print("--\t-----\t\t----")
-for p in projects["list"]:
-    # print(p)
-    id = p["id"]
-    group = p["groupSlug"]
-    name = p["slug"]
-
-    print(str(id) + "\t" + group + " \t" + name)
+
+# projects and their recent run summaries, shared with the other scripts
+CATALOG_PATH = os.getenv("RISKSCAPE_CATALOG", "data/catalog.json")
+# seconds a catalog is used before it is rebuilt from the API
+CATALOG_TTL = int(os.getenv("RISKSCAPE_CATALOG_TTL", "3600"))
+# projects whose recent runs are fetched at the same time
+CATALOG_WORKERS = int(os.getenv("RISKSCAPE_CATALOG_WORKERS", "8"))
+
+
+def run_summary(client, project):
+    """Summarise the recent runs of a project for the catalog."""
+    summary = {
+        "id": project["id"],
+        "group": project["groupSlug"],
+        "slug": project["slug"],
+    }
+    try:
+        model_run = client.get_json(f"/projects/by-id/{project['id']}/runs/recent")
+    except requests.RequestException as e:
+        summary["error"] = str(e)
+        return summary
+
+    outputs = {}
+    run_times = []
+    for run in model_run["list"]:
+        run_time = run.get("finishedAt") or run.get("createdAt")
+        if run_time:
+            run_times.append(run_time)
+        for output in run["outputs"]:
+            media_type = outputs.setdefault(output["mediaType"], {"count": 0, "size": 0})
+            media_type["count"] += 1
+            media_type["size"] += output.get("size") or 0
+
+    summary["runs"] = int(model_run["totalSize"])
+    summary["models"] = sorted({run["externalModelId"] for run in model_run["list"]})
+    summary["latest_run"] = max(run_times) if run_times else None
+    summary["outputs"] = outputs
+    return summary
+
+
+def build_catalog(client, workers=CATALOG_WORKERS):
+    """Fetch every project and, in parallel, the summary of its recent runs."""
+    projects = client.get_json(f"/users/by-username/{RISKSCAPE_USERNAME}/projects/all")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        summaries = list(executor.map(lambda p: run_summary(client, p), projects["list"]))
+    return {
+        "created": time.time(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "projects": summaries,
+    }
+
+
+def save_catalog(catalog, catalog_path=CATALOG_PATH):
+    dir_path = os.path.dirname(os.path.abspath(catalog_path))
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=".part")
+    with os.fdopen(fd, mode="w") as file:
+        json.dump(catalog, file, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, catalog_path)
+
+
+def load_catalog(max_age=CATALOG_TTL, catalog_path=CATALOG_PATH, refresh=False):
+    """Return the project catalog, rebuilding it once it is older than max_age seconds.
+
+    Scripts and dashboards should read projects and run metadata from here
+    rather than querying the API for each project.
+    """
+    if not refresh and os.path.exists(catalog_path):
+        with open(catalog_path) as file:
+            catalog = json.load(file)
+        if time.time() - catalog["created"] < max_age:
+            return catalog
+    catalog = build_catalog(get_client(pool_size=CATALOG_WORKERS))
+    save_catalog(catalog, catalog_path)
+    return catalog
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List Riskscape projects and their recent runs.")
+    parser.add_argument("--refresh", action="store_true", help="rebuild the catalog even if it is current")
+    args = parser.parse_args()
+
+    catalog = load_catalog(refresh=args.refresh)
+    print(f"catalog: {CATALOG_PATH} ({catalog['created_at']})", file=sys.stderr)
+    print("id\tgroup\t\tname\truns\tlatest run\toutputs")
+    print("--\t-----\t\t----\t----\t----------\t-------")
+    for p in catalog["projects"]:
+        if "error" in p:
+            print(f"{p['id']}\t{p['group']} \t{p['slug']}\t-\t-\t{p['error']}")
+            continue
+        outputs = ", ".join(
+            f"{media_type}: {o['count']} ({o['size'] / 1024 / 1024:.1f} MB)"
+            for media_type, o in sorted(p["outputs"].items())
+        )
+        print(f"{p['id']}\t{p['group']} \t{p['slug']}\t{p['runs']}\t{p['latest_run'] or '-'}\t{outputs}")
@@ -0,0 +1,260 @@
+import argparse
+import email.utils
+import gzip
+import io
+import json
+import mimetypes
+import os, sys
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Local stand-in for the parts of the Riskscape API the integration scripts use.
+# Every directory under the data root is served as a project with one recent
+# run, whose outputs are the GeoJSON and CSV files in that directory.
+#
+#   python riskscape_mock_api.py --port 8000 --latency 0.05 --bandwidth 500000
+#   RISKSCAPE_API=http://127.0.0.1:8000/api python riskscape_download.py cook-islands
+
+MEDIA_TYPES = {
+    ".geojson": "application/geo+json",
+    ".csv": "text/csv",
+}
+
+MOCK_TOKEN = "mock-token"
+# bytes written per throttled write when a bandwidth limit is set
+THROTTLE_CHUNK = 16 * 1024
+
+
+def list_projects(data_root):
+    return sorted(
+        name for name in os.listdir(data_root)
+        if os.path.isdir(os.path.join(data_root, name)) and not name.startswith(".")
+    )
+
+
+def list_outputs(data_root, project):
+    """Return the output files of a project relative to its directory."""
+    project_path = os.path.join(data_root, project)
+    outputs = []
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1] in MEDIA_TYPES and not file_name.startswith("."):
+                outputs.append(os.path.relpath(os.path.join(root, file_name), project_path))
+    return outputs
+
+
+class MockRiskscapeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockRiskscape/1.0"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        self.send_json({"message": message}, status=status)
+
+    def project_json(self, project_id, project):
+        return {"id": project_id, "slug": project, "groupSlug": "partner"}
+
+    def run_json(self, project_id, project):
+        outputs = []
+        modified = 0
+        for output in list_outputs(self.server.data_root, project):
+            modified = max(modified, os.path.getmtime(os.path.join(self.server.data_root, project, output)))
+            name, extension = os.path.splitext(output)
+            outputs.append({
+                "name": name.replace(os.sep, "-"),
+                "mediaType": MEDIA_TYPES[extension],
+                "uri": f"/api/projects/by-id/{project_id}/outputs/{output}",
+                "size": os.path.getsize(os.path.join(self.server.data_root, project, output)),
+            })
+        return {
+            "id": project_id,
+            "externalModelId": "mock",
+            "status": "COMPLETE",
+            "createdAt": datetime.fromtimestamp(modified, timezone.utc).isoformat(timespec="seconds"),
+            "finishedAt": datetime.fromtimestamp(modified, timezone.utc).isoformat(timespec="seconds"),
+            "outputs": outputs,
+        }
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/api/token":
+            return self.send_error_json(404, "not found")
+        data = MOCK_TOKEN.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if self.headers.get("rs-api-token") != MOCK_TOKEN:
+            return self.send_error_json(401, "invalid token")
+
+        parts = [unquote(part) for part in self.path.split("?")[0].strip("/").split("/")]
+        if parts[:1] != ["api"]:
+            return self.send_error_json(404, "not found")
+        parts = parts[1:]
+        projects = list_projects(self.server.data_root)
+
+        # /users/by-username/<username>/projects/all
+        if parts[:2] == ["users", "by-username"] and parts[3:] == ["projects", "all"]:
+            return self.send_json({
+                "totalSize": len(projects),
+                "list": [self.project_json(i, p) for i, p in enumerate(projects, 1)],
+            })
+
+        # /projects/by-slug/<group>/<slug>
+        if parts[:2] == ["projects", "by-slug"] and len(parts) == 4:
+            if parts[3] not in projects:
+                return self.send_error_json(404, "no such project")
+            return self.send_json(self.project_json(projects.index(parts[3]) + 1, parts[3]))
+
+        if parts[:2] == ["projects", "by-id"] and len(parts) > 3:
+            try:
+                project_id = int(parts[2])
+                project = projects[project_id - 1]
+            except (ValueError, IndexError):
+                return self.send_error_json(404, "no such project")
+
+            # /projects/by-id/<id>/runs/recent
+            if parts[3:] == ["runs", "recent"]:
+                return self.send_json({"totalSize": 1, "list": [self.run_json(project_id, project)]})
+
+            # /projects/by-id/<id>/outputs/<path>/download
+            if parts[3] == "outputs" and parts[-1] == "download":
+                return self.send_output(os.path.join(project, *parts[4:-1]))
+
+        return self.send_error_json(404, "not found")
+
+    def send_output(self, relative_path):
+        file_path = os.path.join(self.server.data_root, relative_path)
+        if ".." in relative_path.split(os.sep) or not os.path.isfile(file_path):
+            return self.send_error_json(404, "no such output")
+
+        stat = os.stat(file_path)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        if self.headers.get("If-None-Match", "").replace("W/", "") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # like most servers, only whole responses are compressed and their ETag is weakened
+        accept_encoding = self.headers.get("Accept-Encoding", "")
+        if self.server.compress and "gzip" in accept_encoding and not self.headers.get("Range"):
+            with open(file_path, mode="rb") as file:
+                data = gzip.compress(file.read())
+            self.send_response(200)
+            self.send_header("Content-Type", mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("ETag", "W/" + etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            return self.send_body(io.BytesIO(data), len(data))
+
+        start, end = 0, stat.st_size - 1
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        partial = byte_range and byte_range.startswith("bytes=") and if_range in (None, etag, last_modified)
+        if partial:
+            first, _, last = byte_range[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), end) if last else end
+            if start >= stat.st_size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{stat.st_size}")
+        self.end_headers()
+
+        with open(file_path, mode="rb") as file:
+            file.seek(start)
+            self.send_body(file, end - start + 1)
+
+    def send_body(self, file, length):
+        """Write length bytes of file, paced to the server's bandwidth limit."""
+        bandwidth = self.server.bandwidth
+        chunk_size = THROTTLE_CHUNK if bandwidth else 1024 * 1024
+        started = time.monotonic()
+        sent = 0
+        while sent < length:
+            chunk = file.read(min(chunk_size, length - sent))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if bandwidth:
+                delay = sent / bandwidth - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+
+class MockRiskscapeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, data_root="data", latency=0.0, bandwidth=0, compress=True, quiet=False):
+        super().__init__(address, MockRiskscapeHandler)
+        self.data_root = data_root
+        # seconds added before every response
+        self.latency = latency
+        # bytes per second for each output transfer, 0 for unlimited
+        self.bandwidth = bandwidth
+        # gzip outputs for clients that accept it
+        self.compress = compress
+        self.quiet = quiet
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve data/ as a stand-in Riskscape API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default="data", help="directory whose subdirectories are served as projects")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added before every response")
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes/sec per transfer, 0 for unlimited")
+    parser.add_argument("--no-compress", action="store_true", help="never gzip output downloads")
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args()
+
+    server = MockRiskscapeServer(
+        (args.host, args.port), args.data, args.latency, args.bandwidth, not args.no_compress, args.quiet
+    )
+    print(f"Mock Riskscape API on {server.api_url}, serving {args.data}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import geopandas as gpd
+import numpy as np
+import shapely
+from flask import Blueprint, Response, abort, request
+from riskscape_data import datasets
+
+try:
+    import mapbox_vector_tile
+except ImportError:  # the tile endpoint answers 501 until it is installed
+    mapbox_vector_tile = None
+
+# Mapbox vector tiles of the large per-asset outputs, served by the dashboard's
+# Flask server from a spatial index of each dataset, eg:
+#
+#   /tiles/cook-islands/slr-buildings-impact/15/1510/18190.pbf
+#
+# Tiles hold one layer named after the dataset kind, with every column of the
+# output as feature properties and the row number as feature id.
+
+# dataset kinds served as tiles
+TILE_KINDS = ("slr-buildings-impact", "slr-road-impact", "pdna-damaged-buildings", "pdna-damaged-roads")
+# tiles are empty below this zoom, where single buildings are smaller than a pixel
+TILE_MIN_ZOOM = int(os.getenv("RISKSCAPE_TILE_MIN_ZOOM", "10"))
+# seconds browsers and proxies may reuse a tile, they revalidate with its ETag after
+TILE_MAX_AGE = int(os.getenv("RISKSCAPE_TILE_MAX_AGE", "3600"))
+# tile coordinate extent, and the margin in those units drawn outside a tile so
+# strokes are not cut at its edge
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# half the width of the web mercator world in metres
+WEB_MERCATOR_HALF = 20037508.342789244
+
+tiles = Blueprint("tiles", __name__)
+
+
+def tile_bounds(z, x, y):
+    """Return the web mercator bounds of tile z/x/y."""
+    size = 2 * WEB_MERCATOR_HALF / 2 ** z
+    minx = -WEB_MERCATOR_HALF + x * size
+    maxy = WEB_MERCATOR_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def mercator(lon, lat):
+    """Project WGS84 coordinates to web mercator."""
+    x = math.radians(lon) * 6378137
+    y = math.log(math.tan(math.pi / 4 + math.radians(max(min(lat, 85.0511), -85.0511)) / 2)) * 6378137
+    return x, y
+
+
+def feature_properties(frame):
+    """Return each row's properties as tile values, leaving out missing ones."""
+    columns = [name for name in frame.columns if name != frame.geometry.name]
+    records = []
+    for row in frame[columns].itertuples(index=False):
+        properties = {}
+        for name, value in zip(columns, row):
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            properties[name] = value.item() if isinstance(value, np.generic) else value
+        records.append(properties)
+    return records
+
+
+def tile_index(project, kind):
+    """Return the web mercator geometries, their STRtree and properties of a dataset.
+
+    Built once per version of the output and cached in the dataset registry.
+    """
+    def load():
+        frame = datasets.get(project, kind)
+        geometries = np.asarray(frame.geometry.to_crs(3857).array)
+        index = {
+            "geometries": geometries,
+            "tree": shapely.STRtree(geometries),
+            "properties": feature_properties(frame),
+        }
+        # coordinates dominate, properties are small next to them
+        return index, 16 * int(shapely.get_num_coordinates(geometries).sum()) + 200 * len(frame)
+    return datasets.cached((project, kind, "tile_index"), datasets.version(project, kind), load)
+
+
+def render_tile(project, kind, z, x, y):
+    """Encode tile z/x/y of a dataset, or return b"" when no feature touches it."""
+    index = tile_index(project, kind)
+    bounds = tile_bounds(z, x, y)
+    margin = (bounds[2] - bounds[0]) * TILE_BUFFER / TILE_EXTENT
+    clip_bounds = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+    hits = np.sort(index["tree"].query(shapely.box(*clip_bounds), predicate="intersects"))
+    if not len(hits):
+        return b""
+
+    # nothing finer than a tile unit can be drawn
+    geometries = shapely.clip_by_rect(index["geometries"][hits], *clip_bounds)
+    geometries = shapely.simplify(geometries, (bounds[2] - bounds[0]) / TILE_EXTENT, preserve_topology=True)
+    features = [
+        {"geometry": geometry, "properties": index["properties"][i], "id": int(i)}
+        for i, geometry in zip(hits, geometries)
+        if not geometry.is_empty
+    ]
+    if not features:
+        return b""
+    return mapbox_vector_tile.encode(
+        [{"name": kind, "features": features}],
+        default_options={
+            "quantize_bounds": bounds,
+            "extents": TILE_EXTENT,
+            "on_invalid_geometry": mapbox_vector_tile.encoder.on_invalid_geometry_make_valid,
+        },
+    )
+
+
+def get_tile(project, kind, z, x, y):
+    """Return the encoded tile, cached in the dataset registry until its output changes."""
+    def load():
+        tile = render_tile(project, kind, z, x, y)
+        return tile, len(tile) + 100
+    return datasets.cached((project, kind, "tile", z, x, y), datasets.version(project, kind), load)
+
+
+def visible_features(project, kind, bounds, columns=()):
+    """Return the GeoJSON of a dataset's features within map bounds [[south, west], [north, east]].
+
+    For maps that draw a tile layer's features themselves, from the same
+    index. Features are in EPSG:4326 and carry the values of columns,
+    leaving out missing ones.
+    """
+    (south, west), (north, east) = bounds
+    index = tile_index(project, kind)
+    hits = np.sort(index["tree"].query(shapely.box(*mercator(west, south), *mercator(east, north)), predicate="intersects"))
+    frame = datasets.get(project, kind).iloc[hits]
+    # GeoJSON is in longitude and latitude, whatever the CRS of the output
+    if frame.crs is not None and frame.crs.to_epsg() != 4326:
+        frame = frame.to_crs(4326)
+    # a millionth of a degree is about 10cm, finer than any map draws
+    rounded = shapely.transform(frame.geometry.values, lambda coordinates: np.round(coordinates, 6))
+    features = gpd.GeoDataFrame(frame[[column for column in columns if column in frame.columns]], geometry=rounded, crs=frame.crs)
+    return json.loads(features.to_json(na="drop"))
+
+
+@tiles.route("/tiles/<path:project>/<kind>/<int:z>/<int:x>/<int:y>.pbf")
+def tile(project, kind, z, x, y):
+    if mapbox_vector_tile is None:
+        abort(501, "vector tiles need the mapbox-vector-tile package")
+    if kind not in TILE_KINDS or ".." in project.split("/") or not datasets.exists(project, kind):
+        abort(404)
+    if not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        abort(404)
+
+    etag = f'"{datasets.version(project, kind):x}"'
+    if request.if_none_match.contains_weak(etag.strip('"')):
+        return Response(status=304, headers={"ETag": etag})
+    data = get_tile(project, kind, z, x, y) if z >= TILE_MIN_ZOOM else b""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={TILE_MAX_AGE}"}
+    if not data:
+        return Response(status=204, headers=headers)
+    return Response(data, mimetype="application/vnd.mapbox-vector-tile", headers=headers)